@@ -1,111 +1,459 @@
 import asyncio
+import hashlib
+import inspect
 import json
-from typing import Dict, List, Any, Optional
+import orjson
+import os
+import string
+from typing import Dict, List, Any, Optional, Union, Awaitable, Callable
+import httpx
 from mistralai import Mistral
+from mistralai.models import SDKError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 from models import *
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of character profiles requested from Mistral at once
+CHARACTER_CONCURRENCY = 6
+
+# Number of generated chapters buffered before they are written to the database
+CHAPTER_WRITE_BATCH = 4
+
+# Characters of chapter content stored as the chapter's preview
+CHAPTER_PREVIEW_CHARS = 300
+
+# Assumed average Mistral tokens per word of English prose (a rule-of-thumb
+# figure, not measured here); used to size max_tokens for chapters
+TOKENS_PER_WORD = 1.35
+MAX_CHAPTER_TOKENS = 4000
+
+# At most one "running" progress write per agent and project per interval;
+# the latest update in each interval wins
+PROGRESS_THROTTLE_SECONDS = 0.25
+
+# Cached completions expire this long after they were stored (TTL index on
+# llm_cache.created_at, created at startup)
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# HTTP statuses from Mistral that are retried with backoff
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Worldbuilding fields sent to the WorldbuildingAgent, as (label, field) pairs
+_WORLD_OVERVIEW_FIELDS = (
+    ("WORLD SUMMARY", "story_world_summary"),
+    ("GENRES", "genres"),
+    ("TIME PERIOD", "time_period_setting"),
+    ("CULTURAL INFLUENCES", "cultural_influences"),
+)
+
+_WORLD_PROMPT_SECTIONS = (
+    ("WORLD STRUCTURE", (
+        ("Geography", "geography_environment"),
+        ("Climate", "climate_weather"),
+        ("Technology", "technology_level"),
+        ("Magic/Supernatural", "magic_supernatural_rules"),
+        ("Physics", "physics_rules"),
+    )),
+    ("SOCIETY & CULTURE", (
+        ("Governance", "governance_political"),
+        ("Laws", "laws_justice"),
+        ("Economy", "economic_system"),
+        ("Cultural Norms", "cultural_norms_taboos"),
+        ("Religions", "religions_beliefs"),
+        ("Social Hierarchy", "social_hierarchies"),
+    )),
+    ("CONFLICT & POWER", (
+        ("Major Conflict", "major_conflict"),
+        ("Factions", "faction_breakdown"),
+        ("Hidden Powers", "hidden_power_structures"),
+        ("Law Enforcement", "law_enforcement_style"),
+    )),
+    ("THEMES & ATMOSPHERE", (
+        ("Emotional Vibe", "emotional_vibe"),
+        ("Symbolic Motifs", "symbolic_motifs"),
+        ("Historical Trauma", "historical_trauma"),
+    )),
+)
+
+_WORLD_PROMPT_INSTRUCTIONS = """
+Create a detailed world bible that includes:
+1. Key world rules and laws
+2. Important locations and their descriptions
+3. Cultural context for character behavior
+4. Thematic elements to weave into the story
+5. Potential conflicts and tensions
+
+Format this as a comprehensive guide for story generation."""
+
+# Prompt template compiled once at import and filled in per character
+_CHARACTER_TMPL = string.Template("""
+Create a comprehensive character profile for: $name
+
+CHARACTER DATA:
+- Archetype: $archetype
+- Backstory: $backstory
+- Internal Conflict: $internal_conflict
+- External Conflict: $external_conflict
+- Core Belief: $core_belief
+- Emotional Triggers: $emotional_triggers
+- Coping Mechanism: $coping_mechanism
+- Biggest Regret: $biggest_regret
+- Personal Symbol: $personal_symbol
+- Voice/Speech: $voice
+- What Makes Them Laugh: $makes_laugh
+- What Makes Them Cry: $makes_cry
+- Relationships: $relationships
+- Secrets: $secrets
+
+PSYCHOLOGICAL DEPTH:
+- Desire vs Need: $desire_vs_need
+- Line They Won't Cross: $line_never_cross
+- Fear of Becoming: $fears_becoming
+- Public vs Private: $public_vs_private
+
+Create a character guide that includes:
+1. Detailed personality profile
+2. Consistent voice and dialogue style
+3. Character motivations and goals
+4. How they fit into the world's conflicts
+5. Character arc potential
+6. Key relationships and dynamics
+7. Behavioral patterns and quirks
+
+Make this character feel real and three-dimensional within the established world.
+""")
+
+def chapter_preview(content: str) -> str:
+    """The start of a chapter shown in previews, computed once when the chapter is stored"""
+    if len(content) > CHAPTER_PREVIEW_CHARS:
+        return content[:CHAPTER_PREVIEW_CHARS] + "..."
+    return content
+
+def _is_transient_mistral_error(exc: BaseException) -> bool:
+    """Rate limits, server errors and connection problems are worth retrying"""
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return isinstance(exc, SDKError) and getattr(exc, "status_code", None) in RETRYABLE_STATUS_CODES
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+def _retry_after_or_backoff(retry_state) -> float:
+    """Honour a 429's Retry-After header, otherwise back off exponentially with jitter"""
+    exc = retry_state.outcome.exception()
+    response = getattr(exc, "raw_response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
+_mistral_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=_retry_after_or_backoff,
+    retry=retry_if_exception(_is_transient_mistral_error),
+    reraise=True
+)
+
+class MistralGate:
+    """Caps Mistral chat requests in flight and their rate
+    
+    Concurrency is a semaphore; the rate is a token bucket refilled at
+    rpm / 60 tokens per second, holding at most max_concurrent tokens so
+    bursts stay bounded. Share one gate between everything that talks to
+    the same API key.
+    """
+    def __init__(self, max_concurrent: int = 4, rpm: int = 60):
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._capacity = float(max_concurrent)
+        self._tokens = float(max_concurrent)
+        self._refill_per_second = rpm / 60.0
+        self._updated = time.monotonic()
+    
+    @classmethod
+    def from_env(cls) -> "MistralGate":
+        return cls(
+            max_concurrent=int(os.environ.get("MISTRAL_MAX_CONCURRENT", 4)),
+            rpm=int(os.environ.get("MISTRAL_RPM", 60))
+        )
+    
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._refill_per_second)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._refill_per_second)
+    
+    async def __aenter__(self):
+        await self._slots.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self._slots.release()
+
+def count_words(text: str) -> int:
+    """Whitespace-delimited word count
+    
+    len(str.split()) is kept deliberately: the split runs entirely in C and
+    is several times faster than counting \\S+ matches with re.findall or
+    re.finditer (the exact ratio depends on the machine).
+    """
+    return len(text.split())
+
+def chapter_max_tokens(target_words: int) -> int:
+    """Token budget for a chapter of target_words, with a 10% margin for the title and overrun"""
+    return min(MAX_CHAPTER_TOKENS, int(target_words * TOKENS_PER_WORD * 1.1))
+
+def _character_profiles_json(character_context: Dict[str, Any]) -> str:
+    """Serialize the character profiles once per character context
+    
+    The story generator and the sequential checker both embed the profiles in
+    every chapter prompt; the serialized form is stored on the context so the
+    same (sorted, byte-stable) string is reused for the whole book.
+    """
+    if 'character_profiles_json' not in character_context:
+        character_context['character_profiles_json'] = orjson.dumps(
+            character_context.get('character_profiles', {}),
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+        ).decode()
+    return character_context['character_profiles_json']
+
+class ResponseCache:
+    """Exact-match cache of Mistral completions, stored in MongoDB
+    
+    Entries are keyed on a SHA-256 of the model, sampling parameters and
+    messages, so regenerating a project with unchanged inputs reuses the
+    earlier completion instead of repeating the LLM round-trip. MongoDB
+    removes entries LLM_CACHE_TTL_SECONDS after created_at.
+    """
+    def __init__(self, db):
+        self.collection = db.llm_cache
+    
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def get(self, key: str) -> Optional[str]:
+        doc = await self.collection.find_one({"_id": key}, {"content": 1})
+        return doc["content"] if doc else None
+    
+    async def set(self, key: str, content: str):
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {"content": content, "created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+class ProgressThrottler:
+    """Coalesces running progress updates into at most one write per interval
+    
+    set() records the latest update and returns straight away; a background
+    task writes it once the interval since the previous write has passed, so
+    intermediate updates are dropped but the most recent one always lands.
+    """
+    def __init__(self, write: Callable[..., Awaitable[None]],
+                 interval: float = PROGRESS_THROTTLE_SECONDS):
+        self._write = write
+        self._interval = interval
+        self._latest: Optional[tuple] = None
+        self._last_write = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._sleeping = False
+    
+    def set(self, *update):
+        self._latest = update
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        delay = self._last_write + self._interval - time.monotonic()
+        if delay > 0:
+            self._sleeping = True
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._sleeping = False
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Failed to write throttled progress: {str(e)}")
+    
+    async def flush(self):
+        """Write the pending update, if any, now"""
+        update, self._latest = self._latest, None
+        if update is None:
+            return
+        self._last_write = time.monotonic()
+        await self._write(*update)
+    
+    async def discard(self):
+        """Drop the pending update; waits for a write already in flight"""
+        self._latest = None
+        task = self._task
+        if task is None or task.done():
+            return
+        if self._sleeping:
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
 class BaseAgent:
-    def __init__(self, mistral_client: Mistral, db):
+    def __init__(self, mistral_client: Mistral, db, gate: Optional[MistralGate] = None):
         self.mistral_client = mistral_client
         self.db = db
         self.name = self.__class__.__name__
+        # Concurrency/rate limit for Mistral calls; pass a shared gate when
+        # several agents use the same API key
+        self.gate = gate or MistralGate.from_env()
+        self.response_cache = ResponseCache(db)
+        # Running-progress throttle per project (agents are shared across projects)
+        self._progress_throttlers: Dict[str, ProgressThrottler] = {}
+    
+    async def _cached_complete(self, **request: Any) -> str:
+        """Return the completion content for a chat request, consulting the response cache first"""
+        key = ResponseCache.make_key(**request)
+        content = await self.response_cache.get(key)
+        if content is None:
+            response = await self._call_mistral(**request)
+            content = response.choices[0].message.content
+            await self.response_cache.set(key, content)
+        return content
+    
+    @_mistral_retry
+    async def _call_mistral(self, **request: Any):
+        """chat.complete_async through the gate, with retry and backoff on transient failures"""
+        async with self.gate:
+            return await self.mistral_client.chat.complete_async(**request)
+    
+    @_mistral_retry
+    async def _stream_complete(self, on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+                               **request: Any) -> str:
+        """Stream a chat completion and return its full content
+        
+        on_progress, if given, is awaited with the number of words received so
+        far, at most once per PROGRESS_THROTTLE_SECONDS (the rate progress is
+        written at) while the model is still generating. A transient failure
+        restarts the stream from the beginning.
+        """
+        parts = []
+        last_report = time.monotonic()
+        async with self.gate:
+            stream = await self.mistral_client.chat.stream_async(**request)
+            async for event in stream:
+                delta = event.data.choices[0].delta.content
+                if isinstance(delta, str) and delta:
+                    parts.append(delta)
+                    if on_progress and time.monotonic() - last_report >= PROGRESS_THROTTLE_SECONDS:
+                        last_report = time.monotonic()
+                        await on_progress(count_words("".join(parts)))
+        return "".join(parts)
     
     async def update_progress(self, project_id: str, status: AgentStatusEnum, 
                             progress: float, task: str = None, error: str = None):
-        """Update agent progress in database"""
-        await self.db.agent_progress.update_one(
-            {"project_id": project_id, "agent_name": self.name},
-            {
-                "$set": {
-                    "status": status.value,
-                    "progress_percentage": progress,
-                    "current_task": task,
-                    "error_message": error,
-                    "updated_at": datetime.utcnow()
-                }
-            },
-            upsert=True
-        )
+        """Update agent progress and the main project status in database
+        
+        Running updates are coalesced to one write per PROGRESS_THROTTLE_SECONDS
+        per project, latest wins; status transitions (completed/error) replace
+        any pending update and are written straight away.
+        """
+        updated_at = datetime.now(timezone.utc)
+        if status == AgentStatusEnum.running and progress < 99:
+            throttler = self._progress_throttlers.get(project_id)
+            if throttler is None:
+                throttler = self._progress_throttlers[project_id] = ProgressThrottler(self._write_progress)
+            throttler.set(project_id, status, progress, task, error, updated_at)
+            return
         
-        # Also update main project status
-        await self.db.story_projects.update_one(
-            {"id": project_id},
-            {
-                "$set": {
-                    "current_agent": self.name,
-                    "progress_percentage": progress,
-                    "current_status": status.value,
-                    "updated_at": datetime.utcnow()
+        await self.discard_progress(project_id)
+        await self._write_progress(project_id, status, progress, task, error, updated_at)
+    
+    async def discard_progress(self, project_id: str):
+        """Drop this agent's pending running update for a project and release its throttler"""
+        throttler = self._progress_throttlers.pop(project_id, None)
+        if throttler is not None:
+            await throttler.discard()
+    
+    async def _write_progress(self, project_id: str, status: AgentStatusEnum, progress: float,
+                              task: Optional[str], error: Optional[str], updated_at: datetime):
+        await asyncio.gather(
+            self.db.agent_progress.update_one(
+                {"project_id": project_id, "agent_name": self.name},
+                {
+                    "$set": {
+                        "status": status.label,
+                        "progress_percentage": progress,
+                        "current_task": task,
+                        "error_message": error,
+                        "updated_at": updated_at
+                    }
+                },
+                upsert=True
+            ),
+            self.db.story_projects.update_one(
+                {"id": project_id},
+                {
+                    "$set": {
+                        "current_agent": self.name,
+                        "progress_percentage": progress,
+                        "current_status": status.label,
+                        "updated_at": updated_at
+                    }
                 }
-            }
+            )
         )
 
 class WorldbuildingAgent(BaseAgent):
     async def process(self, project_id: str, worldbuilding_data: WorldbuildingContext) -> Dict[str, Any]:
         """Process worldbuilding data and create comprehensive world context"""
         await self.update_progress(project_id, AgentStatusEnum.running, 10, "Analyzing worldbuilding context")
+        worldbuilding_data = worldbuilding_data or WorldbuildingContext()
         
         try:
-            # Create a comprehensive world summary for other agents
-            world_prompt = f"""
-            Analyze and synthesize this worldbuilding information into a comprehensive world guide that other AI agents can use to maintain consistency:
-            
-            WORLD SUMMARY: {worldbuilding_data.story_world_summary}
-            GENRES: {', '.join(worldbuilding_data.genres) if worldbuilding_data.genres else 'Not specified'}
-            TIME PERIOD: {worldbuilding_data.time_period_setting}
-            CULTURAL INFLUENCES: {worldbuilding_data.cultural_influences}
-            
-            WORLD STRUCTURE:
-            - Geography: {worldbuilding_data.geography_environment}
-            - Climate: {worldbuilding_data.climate_weather}
-            - Technology: {worldbuilding_data.technology_level}
-            - Magic/Supernatural: {worldbuilding_data.magic_supernatural_rules}
-            - Physics: {worldbuilding_data.physics_rules}
-            
-            SOCIETY & CULTURE:
-            - Governance: {worldbuilding_data.governance_political}
-            - Laws: {worldbuilding_data.laws_justice}
-            - Economy: {worldbuilding_data.economic_system}
-            - Cultural Norms: {worldbuilding_data.cultural_norms_taboos}
-            - Religions: {worldbuilding_data.religions_beliefs}
-            - Social Hierarchy: {worldbuilding_data.social_hierarchies}
-            
-            CONFLICT & POWER:
-            - Major Conflict: {worldbuilding_data.major_conflict}
-            - Factions: {worldbuilding_data.faction_breakdown}
-            - Hidden Powers: {worldbuilding_data.hidden_power_structures}
-            - Law Enforcement: {worldbuilding_data.law_enforcement_style}
-            
-            THEMES & ATMOSPHERE:
-            - Emotional Vibe: {worldbuilding_data.emotional_vibe}
-            - Symbolic Motifs: {worldbuilding_data.symbolic_motifs}
-            - Historical Trauma: {worldbuilding_data.historical_trauma}
-            
-            Create a detailed world bible that includes:
-            1. Key world rules and laws
-            2. Important locations and their descriptions
-            3. Cultural context for character behavior
-            4. Thematic elements to weave into the story
-            5. Potential conflicts and tensions
-            
-            Format this as a comprehensive guide for story generation.
-            """
+            # Create a comprehensive world summary for other agents. Empty fields
+            # are left out rather than sent to the model as "None".
+            parts = [
+                "Analyze and synthesize this worldbuilding information into a comprehensive world guide "
+                "that other AI agents can use to maintain consistency:",
+                ""
+            ]
+            for label, field in _WORLD_OVERVIEW_FIELDS:
+                value = getattr(worldbuilding_data, field)
+                if value:
+                    parts.append(f"{label}: {', '.join(value) if isinstance(value, list) else value}")
+            
+            for heading, fields in _WORLD_PROMPT_SECTIONS:
+                lines = [f"- {label}: {getattr(worldbuilding_data, field)}"
+                         for label, field in fields if getattr(worldbuilding_data, field)]
+                if lines:
+                    parts.append("")
+                    parts.append(f"{heading}:")
+                    parts.extend(lines)
+            
+            parts.append(_WORLD_PROMPT_INSTRUCTIONS)
+            world_prompt = "\n".join(parts)
             
             await self.update_progress(project_id, AgentStatusEnum.running, 50, "Generating world bible")
             
-            response = await self.mistral_client.chat.complete_async(
+            world_bible = await self._cached_complete(
                 model="mistral-large-latest",
                 messages=[{"role": "user", "content": world_prompt}],
                 max_tokens=2000,
                 temperature=0.3
             )
             
-            world_bible = response.choices[0].message.content
-            
             await self.update_progress(project_id, AgentStatusEnum.completed, 100, "World bible completed")
             
             return {
@@ -123,67 +471,70 @@ class WorldbuildingAgent(BaseAgent):
             raise
 
 class CharacterAgent(BaseAgent):
-    async def process(self, project_id: str, characters: List[Character], world_context: Dict[str, Any]) -> Dict[str, Any]:
-        """Process character data and create detailed character profiles"""
+    async def process(self, project_id: str, characters: List[Character],
+                     world_context: Union[Dict[str, Any], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Process character data and create detailed character profiles
+        
+        world_context may be the worldbuilding result itself or an awaitable
+        (e.g. the still-running WorldbuildingAgent task); in the latter case the
+        per-character prompt sections are built while the world call is in flight.
+        """
         await self.update_progress(project_id, AgentStatusEnum.running, 10, "Analyzing character data")
         
         try:
             character_profiles = {}
             
-            for i, character in enumerate(characters):
-                progress = 10 + (i / len(characters)) * 80
-                await self.update_progress(project_id, AgentStatusEnum.running, progress, f"Processing character: {character.name}")
-                
-                character_prompt = f"""
-                Using this world context:
-                {world_context.get('world_bible', '')}
-                
-                Create a comprehensive character profile for: {character.name}
-                
-                CHARACTER DATA:
-                - Archetype: {character.archetype}
-                - Backstory: {character.backstory_one_sentence}
-                - Internal Conflict: {character.internal_conflict}
-                - External Conflict: {character.external_conflict}
-                - Core Belief: {character.core_belief}
-                - Emotional Triggers: {character.emotional_triggers}
-                - Coping Mechanism: {character.coping_mechanism}
-                - Biggest Regret: {character.biggest_regret}
-                - Personal Symbol: {character.personal_symbol_object}
-                - Voice/Speech: {character.voice_speech_pattern}
-                - What Makes Them Laugh: {character.what_makes_laugh}
-                - What Makes Them Cry: {character.what_makes_cry}
-                - Relationships: {character.relationships_map}
-                - Secrets: {character.secrets}
-                
-                PSYCHOLOGICAL DEPTH:
-                - Desire vs Need: {character.desire_vs_need}
-                - Line They Won't Cross: {character.line_never_cross}
-                - Fear of Becoming: {character.fears_becoming}
-                - Public vs Private: {character.public_vs_private_persona}
-                
-                Create a character guide that includes:
-                1. Detailed personality profile
-                2. Consistent voice and dialogue style
-                3. Character motivations and goals
-                4. How they fit into the world's conflicts
-                5. Character arc potential
-                6. Key relationships and dynamics
-                7. Behavioral patterns and quirks
-                
-                Make this character feel real and three-dimensional within the established world.
-                """
+            # Everything that does not depend on the world bible is prepared up front
+            character_sections = [
+                (character, self._render_character_section(character), character.model_dump())
+                for character in characters
+            ]
+            
+            if inspect.isawaitable(world_context):
+                world_context = await world_context
+            # The world bible is identical for every character, so it goes first
+            # as its own message to give the provider a reusable prompt prefix.
+            world_message = {
+                "role": "system",
+                "content": f"Using this world context:\n{world_context.get('world_bible', '')}"
+            }
+            
+            # Characters are independent of each other, so their LLM calls run
+            # concurrently; the semaphore keeps us inside Mistral's rate limits.
+            semaphore = asyncio.Semaphore(CHARACTER_CONCURRENCY)
+            done = 0
+            
+            async def _one(character: Character, section: str, character_data: Dict[str, Any]):
+                nonlocal done
+                async with semaphore:
+                    profile = await self._cached_complete(
+                        model="mistral-large-latest",
+                        messages=[world_message, {"role": "user", "content": section}],
+                        max_tokens=1500,
+                        temperature=0.4
+                    )
                 
-                response = await self.mistral_client.chat.complete_async(
-                    model="mistral-large-latest",
-                    messages=[{"role": "user", "content": character_prompt}],
-                    max_tokens=1500,
-                    temperature=0.4
-                )
+                done += 1
+                progress = 10 + (done / len(characters)) * 80
+                await self.update_progress(project_id, AgentStatusEnum.running, progress, f"Processed character: {character.name}")
                 
+                return character, character_data, profile
+            
+            tasks = [asyncio.create_task(_one(*item)) for item in character_sections]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # gather leaves the other calls running; stop them before the
+                # failure is reported, so none of them writes progress after it
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            
+            for character, character_data, profile in results:
                 character_profiles[character.name] = {
-                    "profile": response.choices[0].message.content,
-                    "character_data": character.dict(),
+                    "profile": profile,
+                    "character_data": character_data,
                     "key_traits": {
                         "archetype": character.archetype,
                         "voice": character.voice_speech_pattern,
@@ -204,6 +555,31 @@ class CharacterAgent(BaseAgent):
             await self.update_progress(project_id, AgentStatusEnum.error, 0, None, str(e))
             raise
 
+    def _render_character_section(self, character: Character) -> str:
+        """Character-specific part of the profile prompt"""
+        layers = character.psychological_layers
+        return _CHARACTER_TMPL.substitute(
+            name=character.name,
+            archetype=character.archetype.value if character.archetype else None,
+            backstory=character.backstory_one_sentence,
+            internal_conflict=character.internal_conflict,
+            external_conflict=character.external_conflict,
+            core_belief=character.core_belief,
+            emotional_triggers=character.emotional_triggers,
+            coping_mechanism=character.coping_mechanism,
+            biggest_regret=character.biggest_regret,
+            personal_symbol=character.personal_symbol_object,
+            voice=character.voice_speech_pattern,
+            makes_laugh=character.what_makes_laugh,
+            makes_cry=character.what_makes_cry,
+            relationships=character.relationships_map,
+            secrets=character.secrets,
+            desire_vs_need=character.desire_vs_need,
+            line_never_cross=character.line_never_cross,
+            fears_becoming=layers.fears_becoming if layers else None,
+            public_vs_private=character.public_vs_private_persona
+        )
+
 class PlotAgent(BaseAgent):
     async def process(self, project_id: str, plot_data: PlotUtility, world_context: Dict, 
                      character_context: Dict, target_chapters: int) -> Dict[str, Any]:
@@ -211,11 +587,13 @@ class PlotAgent(BaseAgent):
         await self.update_progress(project_id, AgentStatusEnum.running, 10, "Analyzing plot elements")
         
         try:
-            plot_prompt = f"""
-            Create a detailed {target_chapters}-chapter plot structure using this context:
-            
+            world_prompt = f"""
             WORLD CONTEXT:
             {world_context.get('world_bible', '')}
+            """
+            
+            plot_prompt = f"""
+            Create a detailed {target_chapters}-chapter plot structure using the world context above and this context:
             
             CHARACTER CONTEXT:
             Main Characters: {character_context.get('main_characters', [])}
@@ -249,9 +627,12 @@ class PlotAgent(BaseAgent):
             
             await self.update_progress(project_id, AgentStatusEnum.running, 50, "Generating plot structure")
             
-            response = await self.mistral_client.chat.complete_async(
+            response = await self._call_mistral(
                 model="mistral-large-latest",
-                messages=[{"role": "user", "content": plot_prompt}],
+                messages=[
+                    {"role": "system", "content": world_prompt},
+                    {"role": "user", "content": plot_prompt}
+                ],
                 max_tokens=3000,
                 temperature=0.3
             )
@@ -264,7 +645,7 @@ class PlotAgent(BaseAgent):
                 "plot_structure": plot_structure,
                 "chapter_count": target_chapters,
                 "structure_type": "three-act",
-                "plot_elements": plot_data.dict() if plot_data else {}
+                "plot_elements": plot_data.model_dump() if plot_data else {}
             }
             
         except Exception as e:
@@ -272,103 +653,29 @@ class PlotAgent(BaseAgent):
             raise
 
 class StoryGeneratorAgent(BaseAgent):
-    async def process(self, project_id: str, world_context: Dict, character_context: Dict, 
-                     plot_context: Dict, target_words: int) -> List[ChapterContent]:
-        """Generate the actual story content chapter by chapter"""
-        await self.update_progress(project_id, AgentStatusEnum.running, 5, "Initializing story generation")
+    async def save_chapters(self, project_id: str, chapters: List[ChapterContent],
+                            running_synopsis: Optional[str] = None):
+        """Store a batch of chapters and add them to the project's totals (and optionally its synopsis)
         
-        try:
-            chapters = []
-            chapter_count = plot_context.get('chapter_count', 10)
-            
-            for chapter_num in range(1, chapter_count + 1):
-                progress = 5 + (chapter_num / chapter_count) * 85
-                await self.update_progress(project_id, AgentStatusEnum.running, progress, 
-                                         f"Writing Chapter {chapter_num}")
-                
-                # Generate chapter
-                chapter_prompt = f"""
-                Write Chapter {chapter_num} of {chapter_count} for this story.
-                
-                WORLD CONTEXT:
-                {world_context.get('world_bible', '')}
-                
-                CHARACTER PROFILES:
-                {json.dumps(character_context.get('character_profiles', {}), indent=2)}
-                
-                PLOT STRUCTURE:
-                {plot_context.get('plot_structure', '')}
-                
-                PREVIOUS CHAPTERS SUMMARY:
-                {self._get_previous_chapters_summary(chapters)}
-                
-                TARGET WORD COUNT: {target_words} words
-                
-                Requirements:
-                1. Write exactly Chapter {chapter_num} following the plot structure
-                2. Maintain character consistency with established profiles
-                3. Follow world rules and atmosphere
-                4. Ensure smooth continuation from previous chapters
-                5. Include rich sensory details and dialogue
-                6. Advance both plot and character development
-                7. Write in a compelling, engaging narrative style
-                8. Target approximately {target_words} words
-                
-                Write ONLY the chapter content, starting with the chapter title.
-                """
-                
-                response = await self.mistral_client.chat.complete_async(
-                    model="mistral-large-latest",
-                    messages=[{"role": "user", "content": chapter_prompt}],
-                    max_tokens=min(4000, target_words // 100 * 150),  # Adjust tokens based on target words
-                    temperature=0.7
-                )
-                
-                chapter_content = response.choices[0].message.content
-                
-                # Extract title and content
-                lines = chapter_content.split('\n', 1)
-                title = lines[0].strip().replace('#', '').strip()
-                content = lines[1].strip() if len(lines) > 1 else chapter_content
-                
-                # Count words
-                word_count = len(content.split())
-                
-                chapter = ChapterContent(
-                    chapter_number=chapter_num,
-                    title=title,
-                    content=content,
-                    word_count=word_count
-                )
-                
-                chapters.append(chapter)
-                
-                # Update project with new chapter
-                await self.db.story_projects.update_one(
-                    {"id": project_id},
-                    {
-                        "$push": {"chapters": chapter.dict()},
-                        "$inc": {"total_word_count": word_count}
-                    }
-                )
-            
-            await self.update_progress(project_id, AgentStatusEnum.completed, 90, "Story generation completed")
-            return chapters
-            
-        except Exception as e:
-            await self.update_progress(project_id, AgentStatusEnum.error, 0, None, str(e))
-            raise
-    
-    def _get_previous_chapters_summary(self, chapters: List[ChapterContent]) -> str:
-        """Create a summary of previous chapters for context"""
-        if not chapters:
-            return "This is the first chapter."
-        
-        summary = "PREVIOUS CHAPTERS:\n"
-        for chapter in chapters[-3:]:  # Last 3 chapters for context
-            summary += f"Chapter {chapter.chapter_number}: {chapter.title}\n"
-            summary += f"Summary: {chapter.content[:200]}...\n\n"
-        return summary
+        Chapters live in their own collection, keyed by (project_id,
+        chapter_number), so the project document stays small.
+        """
+        update = {"$inc": {"total_word_count": sum(chapter.word_count for chapter in chapters)}}
+        if running_synopsis is not None:
+            update["$set"] = {"running_synopsis": running_synopsis}
+        await asyncio.gather(
+            # Unordered: chapter order comes from chapter_number, so the server
+            # need not apply the inserts in sequence. Any failed insert still
+            # raises BulkWriteError and fails the run; nothing retries a batch.
+            self.db.chapters.insert_many(
+                [
+                    {"project_id": project_id, **chapter.model_dump(), "preview": chapter_preview(chapter.content)}
+                    for chapter in chapters
+                ],
+                ordered=False
+            ),
+            self.db.story_projects.update_one({"id": project_id}, update)
+        )
 
 class SequentialCheckerAgent(BaseAgent):
     async def check_and_fix_chapter(self, project_id: str, chapter: ChapterContent, 
@@ -380,21 +687,17 @@ class SequentialCheckerAgent(BaseAgent):
                                  f"Checking Chapter {chapter.chapter_number}")
         
         try:
-            check_prompt = f"""
-            SEQUENTIAL CHECKER PROTOCOL - Analyze this chapter for consistency and sequential issues:
-            
-            CHAPTER TO CHECK:
-            Title: {chapter.title}
-            Content: {chapter.content}
-            
-            PREVIOUS CHAPTERS CONTEXT:
-            {self._get_context_summary(previous_chapters)}
-            
+            # World rules, character profiles and the checking protocol are the
+            # same for every chapter; they form the leading message so repeated
+            # checks share a prompt prefix. The chapter itself comes last.
+            checker_context = f"""
             WORLD RULES:
             {world_context.get('world_bible', '')}
             
             CHARACTER PROFILES:
-            {json.dumps(character_context.get('character_profiles', {}), indent=2)}
+            {_character_profiles_json(character_context)}
+            
+            SEQUENTIAL CHECKER PROTOCOL - Analyze each chapter you are given for consistency and sequential issues.
             
             PERFORM THESE CHECKS:
             
@@ -423,17 +726,31 @@ class SequentialCheckerAgent(BaseAgent):
             - Clarity and flow: Does it read smoothly?
             - Show don't tell: Is it showing rather than telling?
             
-            RESPOND WITH:
-            1. ISSUES_FOUND: List any problems discovered (or "None" if perfect)
-            2. FIXES_NEEDED: Specific corrections required
-            3. REVISED_CONTENT: The corrected chapter content (only if fixes needed)
+            RESPOND WITH A JSON OBJECT of exactly this shape:
+            {{
+                "approved": true if no issues were found, otherwise false,
+                "issues": [list of problems discovered, empty if none],
+                "fixes": [specific corrections required, empty if none],
+                "revised_content": the corrected chapter content, or null if no fixes are needed
+            }}
+            """
             
-            If no issues found, respond with "APPROVED" and the original content.
+            check_prompt = f"""
+            PREVIOUS CHAPTERS CONTEXT:
+            {self._get_context_summary(previous_chapters)}
+            
+            CHAPTER TO CHECK:
+            Title: {chapter.title}
+            Content: {chapter.content}
             """
             
-            response = await self.mistral_client.chat.complete_async(
+            response = await self._call_mistral(
                 model="mistral-large-latest",
-                messages=[{"role": "user", "content": check_prompt}],
+                messages=[
+                    {"role": "system", "content": checker_context},
+                    {"role": "user", "content": check_prompt}
+                ],
+                response_format={"type": "json_object"},
                 max_tokens=4000,
                 temperature=0.2  # Low temperature for consistency checking
             )
@@ -441,23 +758,22 @@ class SequentialCheckerAgent(BaseAgent):
             checker_response = response.choices[0].message.content
             
             # Parse the response
-            if "APPROVED" in checker_response:
+            result = SequentialCheckResult(**json.loads(checker_response))
+            
+            if result.approved:
                 chapter.sequential_check_passed = True
                 chapter.issues_found = []
                 chapter.issues_fixed = []
             else:
-                # Extract issues and fixes
-                issues = self._extract_issues(checker_response)
-                fixes = self._extract_fixes(checker_response)
-                revised_content = self._extract_revised_content(checker_response)
+                issues = [issue for issue in result.issues if issue.strip().lower() != 'none']
                 
-                if revised_content:
-                    chapter.content = revised_content
-                    chapter.word_count = len(revised_content.split())
+                if result.revised_content:
+                    chapter.content = result.revised_content
+                    chapter.word_count = count_words(result.revised_content)
                 
                 chapter.sequential_check_passed = len(issues) == 0
                 chapter.issues_found = issues
-                chapter.issues_fixed = fixes
+                chapter.issues_fixed = result.fixes
             
             return chapter
             
@@ -478,35 +794,3 @@ class SequentialCheckerAgent(BaseAgent):
             summary += f"Chapter {chapter.chapter_number}: {chapter.title}\n"
             summary += f"Key events: {chapter.content[:150]}...\n\n"
         return summary
-    
-    def _extract_issues(self, response: str) -> List[str]:
-        """Extract issues from checker response"""
-        try:
-            if "ISSUES_FOUND:" in response:
-                issues_section = response.split("ISSUES_FOUND:")[1].split("FIXES_NEEDED:")[0]
-                issues = [issue.strip() for issue in issues_section.split('\n') if issue.strip()]
-                return [issue for issue in issues if issue.lower() != 'none']
-            return []
-        except:
-            return []
-    
-    def _extract_fixes(self, response: str) -> List[str]:
-        """Extract fixes from checker response"""
-        try:
-            if "FIXES_NEEDED:" in response:
-                fixes_section = response.split("FIXES_NEEDED:")[1].split("REVISED_CONTENT:")[0]
-                fixes = [fix.strip() for fix in fixes_section.split('\n') if fix.strip()]
-                return fixes
-            return []
-        except:
-            return []
-    
-    def _extract_revised_content(self, response: str) -> Optional[str]:
-        """Extract revised content from checker response"""
-        try:
-            if "REVISED_CONTENT:" in response:
-                revised_section = response.split("REVISED_CONTENT:")[1].strip()
-                return revised_section
-            return None
-        except:
-            return None
\ No newline at end of file
@@ -1,21 +1,193 @@
+import asyncio
+import functools
+import html
+import io
+import math
 import os
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_SECTION
-from docx.oxml.shared import OxmlElement, qn
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
-from models import ChapterContent, AgentStatusEnum
-from typing import List, Dict, Any
-from datetime import datetime
+import re
+import zipfile
+from concurrent.futures import Executor
+from models import ChapterContent, AgentStatusEnum, utcnow
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import logging
 
+# python-docx (and lxml behind it) is imported lazily inside the few methods
+# that touch the object model, so workers that never build a skeleton don't
+# pay for it.
+if TYPE_CHECKING:
+    from docx.document import Document
+
 logger = logging.getLogger(__name__)
 
+# KDP page dimensions in EMU (python-docx lengths are EMU ints), folded once
+# here instead of building Inches()/Pt() objects on every call
+_EMU_PER_INCH = 914400
+_EMU_PER_PT = 12700
+
+_PAGE_HEIGHT = 11 * _EMU_PER_INCH
+_PAGE_WIDTH = int(8.5 * _EMU_PER_INCH)
+# KDP minimum is 0.25" on all sides, but 0.5" is safer
+_MARGIN_TOP = int(0.75 * _EMU_PER_INCH)
+_MARGIN_BOTTOM = int(0.75 * _EMU_PER_INCH)
+_MARGIN_LEFT = int(0.625 * _EMU_PER_INCH)  # Slightly larger for binding
+_MARGIN_RIGHT = int(0.5 * _EMU_PER_INCH)
+_HEADER_FOOTER_DISTANCE = int(0.5 * _EMU_PER_INCH)
+_BODY_INDENT = int(0.5 * _EMU_PER_INCH)
+_DIALOGUE_INDENT = int(0.25 * _EMU_PER_INCH)
+_TOC_TAB_STOP = int(6.5 * _EMU_PER_INCH)
+
+_BODY_SIZE = 11 * _EMU_PER_PT
+_PARAGRAPH_SPACE_AFTER = 6 * _EMU_PER_PT
+_CHAPTER_TITLE_SIZE = 16 * _EMU_PER_PT
+_HEADER_SIZE = 9 * _EMU_PER_PT
+
+# Body paragraphs are rendered from these templates instead of through the
+# python-docx object model; {text} must already be run content (_run_text/_run_xml).
+# Font, size, indent and alignment come from the KDP* paragraph styles defined
+# in the skeleton, so runs only carry formatting that differs from their style.
+_RUN_PROPS = '<w:rPr><w:rFonts w:ascii="Times New Roman" w:hAnsi="Times New Roman"/>{extra}<w:sz w:val="{size}"/></w:rPr>'
+
+_BODY_PARA_XML = '<w:p><w:pPr><w:pStyle w:val="KDPBody"/></w:pPr><w:r>{text}</w:r></w:p>'
+_DIALOGUE_PARA_XML = '<w:p><w:pPr><w:pStyle w:val="KDPDialogue"/></w:pPr><w:r>{text}</w:r></w:p>'
+_EMPTY_PARA_XML = '<w:p/>'
+_PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_TITLE_PARA_XML = (
+    '<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+    '<w:r>' + _RUN_PROPS.format(extra='<w:b/>', size=48) + '{text}</w:r></w:p>'
+)
+# The author line is pushed down the title page by paragraph spacing
+# (3600 twips = 2.5") rather than a run of empty paragraphs.
+_AUTHOR_PARA_XML = (
+    '<w:p><w:pPr><w:spacing w:before="3600"/><w:jc w:val="center"/></w:pPr>'
+    '<w:r>' + _RUN_PROPS.format(extra='', size=28) + '{text}</w:r></w:p>'
+)
+_TOC_TITLE_PARA_XML = (
+    '<w:p><w:pPr><w:pStyle w:val="KDPChapterTitle"/></w:pPr>'
+    '<w:r><w:t>Table of Contents</w:t></w:r></w:p>'
+)
+_TOC_ENTRY_PARA_XML = '<w:p><w:pPr><w:pStyle w:val="KDPTOCEntry"/></w:pPr><w:r>{text}</w:r></w:p>'
+_CHAPTER_HEADING_XML = (
+    '<w:p><w:pPr><w:pStyle w:val="KDPChapterTitle"/></w:pPr>'
+    '<w:r><w:rPr><w:sz w:val="28"/></w:rPr><w:t>Chapter {number}</w:t></w:r>'
+    '<w:r><w:br/></w:r>'
+    '<w:r>{title}</w:r></w:p>'
+)
+
+GENERATED_BOOKS_DIR = "/app/backend/generated_books"
+
+# Anything but word characters, dots and dashes (path separators, spaces,
+# reserved characters) collapses to a single underscore in file names
+_FN_SANITIZE = re.compile(r'[^\w.-]+')
+
+
+def kdp_document_filename(title: str, project_id: str) -> str:
+    """File name of the KDP document generated for a project"""
+    return f"{_FN_SANITIZE.sub('_', title)[:100]}_{project_id}.docx"
+
+
+def legacy_kdp_document_filename(title: str, project_id: str) -> str:
+    """File name documents were generated under before kdp_document_filename"""
+    return f"{title.replace(' ', '_').replace('/', '_')}_{project_id}.docx"
+
+
+# One match per non-blank paragraph (blocks separated by a blank line), already
+# stripped, so content never has to be split into an intermediate list.
+_PARA_RE = re.compile(r'\s*(\S.*?)\s*(?=\n\n|\Z)', re.DOTALL)
+
+# Page estimate for the table of contents
+WORDS_PER_PAGE = 300
+FIRST_CHAPTER_PAGE = 3  # after the title page and the TOC
+
+# PAGE field for the footer, as one run so it is a single parse_xml call
+_PAGE_FIELD_XML = (
+    '<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:fldChar w:fldCharType="begin"/>'
+    '<w:instrText xml:space="preserve">PAGE</w:instrText>'
+    '<w:fldChar w:fldCharType="end"/>'
+    '</w:r>'
+)
+
+_DOCUMENT_PART = 'word/document.xml'
+_BODY_OPEN = '<w:body>'
+
+
+@functools.lru_cache(maxsize=256)
+def _xml_escape(text: str) -> str:
+    """Escape short, repeated strings such as chapter titles (memoized)"""
+    return html.escape(text, quote=False)
+
+
+def _run_xml(escaped: str) -> str:
+    """Wrap already-escaped text as run content, mapping newlines and tabs to their WordprocessingML elements"""
+    if '\n' in escaped or '\t' in escaped:
+        escaped = escaped.replace('\t', '</w:t><w:tab/><w:t xml:space="preserve">')
+        escaped = escaped.replace('\n', '</w:t><w:br/><w:t xml:space="preserve">')
+    return f'<w:t xml:space="preserve">{escaped}</w:t>'
+
+
+def _run_text(text: str) -> str:
+    """Escape unique text such as chapter paragraphs into run content"""
+    return _run_xml(html.escape(text, quote=False))
+
+
+def _formatted_content_xml(content: str) -> str:
+    """Render content with proper paragraph breaks; dialogue gets a smaller indent"""
+    return ''.join([
+        (_DIALOGUE_PARA_XML if text[0] == '"' else _BODY_PARA_XML).format(text=_run_text(text))
+        for text in (match.group(1) for match in _PARA_RE.finditer(content))
+    ])
+
+
+def render_chapter_xml(chapter: Dict[str, Any], is_first: bool = False) -> str:
+    """Render one chapter to WordprocessingML paragraphs.
+
+    Pure and picklable so chapters can be rendered in worker processes.
+    """
+    parts = []
+    if not is_first:
+        # Page break before each chapter (except first)
+        parts.append(_PAGE_BREAK_XML)
+    parts.append(_CHAPTER_HEADING_XML.format(
+        number=chapter["chapter_number"],
+        title=_run_xml(_xml_escape(chapter["title"])),
+    ))
+    # Space before content
+    parts.append(_EMPTY_PARA_XML)
+    parts.append(_formatted_content_xml(chapter["content"]))
+    return ''.join(parts)
+
+
+def _build_docx(skeleton: bytes, body_parts: List[str]) -> bytes:
+    """Return the skeleton package with body_parts spliced into word/document.xml"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(skeleton)) as src, \
+            zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == _DOCUMENT_PART:
+                head, tail = data.decode('utf-8').split(_BODY_OPEN, 1)
+                data = ''.join((head, _BODY_OPEN, *body_parts, tail)).encode('utf-8')
+            dst.writestr(item, data)
+    return buffer.getvalue()
+
+
+def _write_file(filepath: str, data: bytes) -> None:
+    """Create the parent directory if needed and write data to filepath"""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
 class DocumentFormatter:
-    def __init__(self):
+    # Page setup and styles never change between books, so the skeleton package
+    # is built once and reused. Bump the version whenever _setup_kdp_formatting
+    # changes so a stale file on disk is not picked up.
+    _template_path = "/app/backend/templates/kdp_skeleton_v3.docx"
+    
+    def __init__(self, pool: Optional[Executor] = None):
         self.name = "DocumentFormatter"
+        # Process pool for chapter rendering; the owner (e.g. the server) shuts
+        # it down. Without one, chapters are rendered in worker threads.
+        self._pool = pool
         
     async def update_progress(self, db, project_id: str, status: AgentStatusEnum, 
                             progress: float, task: str = None):
@@ -24,10 +196,10 @@ class DocumentFormatter:
             {"project_id": project_id, "agent_name": self.name},
             {
                 "$set": {
-                    "status": status.value,
+                    "status": status.label,
                     "progress_percentage": progress,
                     "current_task": task,
-                    "updated_at": datetime.utcnow()
+                    "updated_at": utcnow()
                 }
             },
             upsert=True
@@ -37,30 +209,33 @@ class DocumentFormatter:
                                 project_id: str) -> str:
         """Create a KDP-ready Word document"""
         try:
-            # Create new document
-            doc = Document()
-            
-            # Set up KDP formatting (8.5" x 11")
-            self._setup_kdp_formatting(doc)
-            
-            # Add title page
-            self._add_title_page(doc, title)
-            
-            # Add table of contents
-            self._add_table_of_contents(doc, chapters)
+            # python-docx only builds the cached skeleton (page setup, styles);
+            # the body is rendered straight to WordprocessingML below.
+            skeleton = await asyncio.to_thread(self._load_template_bytes)
             
-            # Add chapters
-            for i, chapter in enumerate(chapters):
-                self._add_chapter(doc, chapter, i == 0)
+            # Chapters have no layout dependency on each other, so render them
+            # in worker processes and stitch the fragments together in order.
+            if self._pool is not None:
+                loop = asyncio.get_running_loop()
+                renders = [
+                    loop.run_in_executor(self._pool, render_chapter_xml, chapter.model_dump(), i == 0)
+                    for i, chapter in enumerate(chapters)
+                ]
+            else:
+                renders = [
+                    asyncio.to_thread(render_chapter_xml, chapter.model_dump(), i == 0)
+                    for i, chapter in enumerate(chapters)
+                ]
+            chapter_xml = await asyncio.gather(*renders)
+            body_parts = [self._title_page_xml(title), self._toc_xml(chapters), *chapter_xml]
             
             # Save document
-            filename = f"{title.replace(' ', '_').replace('/', '_')}_{project_id}.docx"
-            filepath = f"/app/backend/generated_books/{filename}"
+            filepath = os.path.join(GENERATED_BOOKS_DIR, kdp_document_filename(title, project_id))
             
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            
-            doc.save(filepath)
+            # Join the body and deflate the package in memory (CPU), then flush
+            # it to disk (I/O); all synchronous, so keep them off the event loop.
+            data = await asyncio.to_thread(_build_docx, skeleton, body_parts)
+            await asyncio.to_thread(_write_file, filepath, data)
             
             logger.info(f"KDP document created: {filepath}")
             return filepath
@@ -69,138 +244,117 @@ class DocumentFormatter:
             logger.error(f"Error creating KDP document: {str(e)}")
             raise
     
-    def _setup_kdp_formatting(self, doc: Document):
+    async def prepare_template(self):
+        """Build or load the cached KDP skeleton ahead of the first document"""
+        await asyncio.to_thread(self._load_template_bytes)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_template_bytes(cls) -> bytes:
+        """Return the KDP skeleton package, building and saving it on first use"""
+        if os.path.exists(cls._template_path):
+            with open(cls._template_path, 'rb') as f:
+                return f.read()
+        
+        from docx import Document
+        
+        doc = Document()
+        cls._setup_kdp_formatting(doc)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        skeleton = buffer.getvalue()
+        try:
+            os.makedirs(os.path.dirname(cls._template_path), exist_ok=True)
+            with open(cls._template_path, 'wb') as f:
+                f.write(skeleton)
+        except OSError as e:
+            logger.warning(f"Could not save KDP template {cls._template_path}: {str(e)}")
+        return skeleton
+    
+    @staticmethod
+    def _setup_kdp_formatting(doc: "Document"):
         """Set up KDP-specific formatting for 8.5" x 11" page"""
+        from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_TAB_ALIGNMENT, WD_TAB_LEADER
+        from docx.enum.style import WD_STYLE_TYPE
+        
         # Get the section
         section = doc.sections[0]
         
         # Set page size to 8.5" x 11" (KDP standard)
-        section.page_height = Inches(11)
-        section.page_width = Inches(8.5)
+        section.page_height = _PAGE_HEIGHT
+        section.page_width = _PAGE_WIDTH
         
         # Set margins for KDP (minimum 0.25" on all sides, but 0.5" is safer)
-        section.top_margin = Inches(0.75)
-        section.bottom_margin = Inches(0.75)
-        section.left_margin = Inches(0.625)  # Slightly larger for binding
-        section.right_margin = Inches(0.5)
+        section.top_margin = _MARGIN_TOP
+        section.bottom_margin = _MARGIN_BOTTOM
+        section.left_margin = _MARGIN_LEFT
+        section.right_margin = _MARGIN_RIGHT
         
         # Set header/footer margins
-        section.header_distance = Inches(0.5)
-        section.footer_distance = Inches(0.5)
+        section.header_distance = _HEADER_FOOTER_DISTANCE
+        section.footer_distance = _HEADER_FOOTER_DISTANCE
         
         # Set default font
         style = doc.styles['Normal']
         font = style.font
         font.name = 'Times New Roman'
-        font.size = Pt(11)
+        font.size = _BODY_SIZE
         
         # Set paragraph spacing
         paragraph_format = style.paragraph_format
-        paragraph_format.space_after = Pt(6)
+        paragraph_format.space_after = _PARAGRAPH_SPACE_AFTER
         paragraph_format.line_spacing = 1.15
-    
-    def _add_title_page(self, doc: Document, title: str):
-        """Add a professional title page"""
-        # Add title
-        title_paragraph = doc.add_paragraph()
-        title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title_run = title_paragraph.add_run(title)
-        title_run.font.name = 'Times New Roman'
-        title_run.font.size = Pt(24)
-        title_run.bold = True
-        
-        # Add some space
-        for _ in range(8):
-            doc.add_paragraph()
         
-        # Add author placeholder
-        author_paragraph = doc.add_paragraph()
-        author_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        author_run = author_paragraph.add_run("by [Author Name]")
-        author_run.font.name = 'Times New Roman'
-        author_run.font.size = Pt(14)
+        # Paragraph styles referenced by the body templates
+        styles = doc.styles
+        body = styles.add_style('KDPBody', WD_STYLE_TYPE.PARAGRAPH)
+        body.base_style = style
+        body.paragraph_format.first_line_indent = _BODY_INDENT
+        body.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
         
-        # Add page break
-        doc.add_page_break()
-    
-    def _add_table_of_contents(self, doc: Document, chapters: List[ChapterContent]):
-        """Add table of contents"""
-        # TOC Title
-        toc_title = doc.add_paragraph()
-        toc_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        toc_run = toc_title.add_run("Table of Contents")
-        toc_run.font.name = 'Times New Roman'
-        toc_run.font.size = Pt(16)
-        toc_run.bold = True
-        
-        doc.add_paragraph()
+        dialogue = styles.add_style('KDPDialogue', WD_STYLE_TYPE.PARAGRAPH)
+        dialogue.base_style = body
+        dialogue.paragraph_format.first_line_indent = _DIALOGUE_INDENT
         
-        # Add chapters to TOC
-        for chapter in chapters:
-            toc_entry = doc.add_paragraph()
-            toc_entry.add_run(f"Chapter {chapter.chapter_number}: {chapter.title}")
-            toc_entry.add_run("\t")
-            toc_entry.add_run(f"{chapter.chapter_number + 2}")  # Page numbers (approximate)
+        chapter_title = styles.add_style('KDPChapterTitle', WD_STYLE_TYPE.PARAGRAPH)
+        chapter_title.base_style = style
+        chapter_title.font.size = _CHAPTER_TITLE_SIZE
+        chapter_title.font.bold = True
+        chapter_title.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # Add page break
-        doc.add_page_break()
+        toc_entry = styles.add_style('KDPTOCEntry', WD_STYLE_TYPE.PARAGRAPH)
+        toc_entry.base_style = style
+        toc_entry.paragraph_format.tab_stops.add_tab_stop(
+            _TOC_TAB_STOP, WD_TAB_ALIGNMENT.RIGHT, WD_TAB_LEADER.DOTS
+        )
     
-    def _add_chapter(self, doc: Document, chapter: ChapterContent, is_first: bool = False):
-        """Add a chapter to the document"""
-        if not is_first:
-            # Add page break before each chapter (except first)
-            doc.add_page_break()
-        
-        # Chapter title
-        chapter_title = doc.add_paragraph()
-        chapter_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Chapter number
-        chapter_num_run = chapter_title.add_run(f"Chapter {chapter.chapter_number}")
-        chapter_num_run.font.name = 'Times New Roman'
-        chapter_num_run.font.size = Pt(14)
-        chapter_num_run.bold = True
-        
-        # Chapter title
-        chapter_title.add_run("\n")
-        title_run = chapter_title.add_run(chapter.title)
-        title_run.font.name = 'Times New Roman'
-        title_run.font.size = Pt(16)
-        title_run.bold = True
-        
-        # Add space before content
-        doc.add_paragraph()
-        
-        # Add chapter content
-        self._add_formatted_content(doc, chapter.content)
+    def _title_page_xml(self, title: str) -> str:
+        """Render the title page"""
+        return ''.join([
+            _TITLE_PARA_XML.format(text=_run_xml(_xml_escape(title))),
+            # Author placeholder
+            _AUTHOR_PARA_XML.format(text=_run_text("by [Author Name]")),
+            _PAGE_BREAK_XML,
+        ])
     
-    def _add_formatted_content(self, doc: Document, content: str):
-        """Add formatted content with proper paragraph breaks"""
-        paragraphs = content.split('\n\n')
-        
-        for para_text in paragraphs:
-            if para_text.strip():
-                # Handle dialogue and regular paragraphs
-                para = doc.add_paragraph()
-                
-                # Check if it's dialogue (starts with quote)
-                if para_text.strip().startswith('"'):
-                    # Indent dialogue slightly
-                    para.paragraph_format.first_line_indent = Inches(0.25)
-                else:
-                    # Regular paragraph indent
-                    para.paragraph_format.first_line_indent = Inches(0.5)
-                
-                # Add the text
-                run = para.add_run(para_text.strip())
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(11)
-                
-                # Justify text
-                para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    def _toc_xml(self, chapters: List[ChapterContent]) -> str:
+        """Render the table of contents"""
+        parts = [_TOC_TITLE_PARA_XML, _EMPTY_PARA_XML]
+        # Estimated from word counts; every chapter starts on a new page
+        page = FIRST_CHAPTER_PAGE
+        for chapter in chapters:
+            parts.append(_TOC_ENTRY_PARA_XML.format(
+                text=_run_xml(f"Chapter {chapter.chapter_number}: {_xml_escape(chapter.title)}\t{page}"),
+            ))
+            page += max(1, math.ceil(chapter.word_count / WORDS_PER_PAGE))
+        parts.append(_PAGE_BREAK_XML)
+        return ''.join(parts)
     
-    def _add_headers_footers(self, doc: Document, title: str):
+    def _add_headers_footers(self, doc: "Document", title: str):
         """Add headers and footers for professional look"""
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.oxml import parse_xml
+        
         section = doc.sections[0]
         
         # Header
@@ -209,7 +363,7 @@ class DocumentFormatter:
         header_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         header_run = header_para.add_run(title)
         header_run.font.name = 'Times New Roman'
-        header_run.font.size = Pt(9)
+        header_run.font.size = _HEADER_SIZE
         header_run.italic = True
         
         # Footer with page numbers
@@ -218,55 +372,55 @@ class DocumentFormatter:
         footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
         # Add page number field
-        fldChar1 = OxmlElement('w:fldChar')
-        fldChar1.set(qn('w:fldCharType'), 'begin')
-        
-        instrText = OxmlElement('w:instrText')
-        instrText.set(qn('xml:space'), 'preserve')
-        instrText.text = 'PAGE'
-        
-        fldChar2 = OxmlElement('w:fldChar')
-        fldChar2.set(qn('w:fldCharType'), 'end')
-        
-        footer_para._p.append(fldChar1)
-        footer_para._p.append(instrText)
-        footer_para._p.append(fldChar2)
+        footer_para._p.append(parse_xml(_PAGE_FIELD_XML))
     
-    def get_file_size_mb(self, filepath: str) -> float:
-        """Get file size in MB"""
+    def get_file_size_mb(self, filepath: str) -> Optional[float]:
+        """Get file size in MB, or None if the file does not exist"""
         try:
-            size_bytes = os.path.getsize(filepath)
-            return size_bytes / (1024 * 1024)
-        except:
-            return 0.0
+            return os.stat(filepath).st_size / (1024 * 1024)
+        except FileNotFoundError:
+            return None
     
     def validate_kdp_requirements(self, filepath: str) -> Dict[str, Any]:
         """Validate that the document meets KDP requirements"""
+        try:
+            # One stat() answers both existence and size
+            size_bytes = os.stat(filepath).st_size
+        except FileNotFoundError:
+            return {"valid": False, "warnings": [], "errors": ["File does not exist"]}
+        except Exception as e:
+            return {"valid": False, "warnings": [], "errors": [f"Validation error: {str(e)}"]}
+        return self._validate_size(size_bytes)
+    
+    def validate_kdp_directory(self, directory: str) -> Dict[str, Dict[str, Any]]:
+        """Validate every .docx in a directory, keyed by path.
+
+        Sizes come from a single scandir() pass instead of a stat() per file.
+        """
+        results = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.docx') and entry.is_file():
+                    results[entry.path] = self._validate_size(entry.stat().st_size)
+        return results
+    
+    def _validate_size(self, size_bytes: int) -> Dict[str, Any]:
+        """Build validation results for an existing document of the given size"""
         validation_results = {
             "valid": True,
             "warnings": [],
             "errors": []
         }
         
-        try:
-            # Check file size (KDP limit is around 650MB, but much smaller is better)
-            file_size_mb = self.get_file_size_mb(filepath)
-            if file_size_mb > 50:  # 50MB warning threshold
-                validation_results["warnings"].append(f"Large file size: {file_size_mb:.2f}MB")
-            
-            # Check if file exists
-            if not os.path.exists(filepath):
-                validation_results["errors"].append("File does not exist")
-                validation_results["valid"] = False
-            
-            # You could add more validation here:
-            # - Check document structure
-            # - Validate formatting
-            # - Check for proper margins
-            # - Verify fonts are embeddable
-            
-        except Exception as e:
-            validation_results["errors"].append(f"Validation error: {str(e)}")
-            validation_results["valid"] = False
+        # Check file size (KDP limit is around 650MB, but much smaller is better)
+        file_size_mb = size_bytes / (1024 * 1024)
+        if file_size_mb > 50:  # 50MB warning threshold
+            validation_results["warnings"].append(f"Large file size: {file_size_mb:.2f}MB")
+        
+        # You could add more validation here:
+        # - Check document structure
+        # - Validate formatting
+        # - Check for proper margins
+        # - Verify fonts are embeddable
         
-        return validation_results
\ No newline at end of file
+        return validation_results
@@ -1,8 +1,20 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+from pydantic_core import core_schema
 from typing import List, Optional, Dict, Any
+import sys
 import uuid
-from datetime import datetime
-from enum import Enum
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import Enum, IntEnum
+from dataclasses import dataclass
+
+# Request-scoped "now", set by the API middleware so every model created while
+# handling one request shares a single timestamp
+request_now: ContextVar[Optional[datetime]] = ContextVar("request_now", default=None)
+
+def utcnow() -> datetime:
+    """The current request's timestamp, or a fresh timezone-aware UTC now outside a request"""
+    return request_now.get() or datetime.now(timezone.utc)
 
 # Enums
 class StoryGenreEnum(str, Enum):
@@ -38,11 +50,40 @@ class CharacterArcTypeEnum(str, Enum):
     redemption_arc = "Redemption Arc"
     corruption_arc = "Corruption Arc"
 
-class AgentStatusEnum(str, Enum):
-    pending = "pending"
-    running = "running"
-    completed = "completed"
-    error = "error"
+class AgentStatusEnum(IntEnum):
+    """Agent/project status. Compared as ints in-process; the name ("running")
+    is what gets stored in Mongo and returned by the API."""
+    pending = 0
+    running = 1
+    completed = 2
+    error = 3
+    
+    @classmethod
+    def _missing_(cls, value):
+        # Accept the stored/API form, e.g. AgentStatusEnum("running")
+        if isinstance(value, str):
+            return cls.__members__.get(value)
+        return None
+    
+    @property
+    def label(self) -> str:
+        return self.name
+    
+    def __str__(self) -> str:
+        return self.name
+    
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda status: status.name
+            ),
+        )
+    
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "string", "enum": list(cls.__members__)}
     
 # Worldbuilding Models
 class WorldbuildingContext(BaseModel):
@@ -109,7 +150,10 @@ class WorldbuildingContext(BaseModel):
     whats_changing: Optional[str] = None
 
 # Character Models
-class PsychologicalLayers(BaseModel):
+# Plain slotted dataclass: a pure data bag that is never mutated after
+# validation, so it skips the per-instance __dict__ of a BaseModel.
+@dataclass(slots=True, frozen=True)
+class PsychologicalLayers:
     core_belief_self: Optional[str] = None
     core_belief_world: Optional[str] = None
     desire_vs_need: Optional[str] = None
@@ -221,7 +265,13 @@ class Character(BaseModel):
     plot_role_tag: Optional[str] = None
     secrets: Optional[str] = None
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    
+    @field_validator('arc_in_one_word', 'plot_role_tag', mode='after')
+    @classmethod
+    def _intern_tag(cls, value: Optional[str]) -> Optional[str]:
+        # Short tags drawn from a small recurring vocabulary; share one copy each
+        return sys.intern(value) if value is not None else None
 
 # Plot Utility Models
 class PlotUtility(BaseModel):
@@ -268,11 +318,50 @@ class StoryProject(BaseModel):
     progress_percentage: float = 0.0
     
     # Generated Content
-    chapters: List[Dict[str, Any]] = []  # Will store chapter content
+    chapters: List[Dict[str, Any]] = []  # Stored in the chapters collection, filled in on read
     total_word_count: int = 0
+    running_synopsis: str = ""  # Short story-so-far used as chapter context
+    
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
+
+class ProjectCreate(BaseModel):
+    """Request body for creating a StoryProject"""
+    title: str
+    target_chapters: int = 10
+    target_words_per_chapter: int = 2000
+    worldbuilding: Optional[WorldbuildingContext] = None
+    characters: List[Character] = []
+    plot_utility: Optional[PlotUtility] = None
+
+class ProjectUpdate(BaseModel):
+    """Request body for updating a StoryProject; only the fields sent are changed"""
+    title: Optional[str] = None
+    target_chapters: Optional[int] = None
+    target_words_per_chapter: Optional[int] = None
+    worldbuilding: Optional[WorldbuildingContext] = None
+    characters: Optional[List[Character]] = None
+    plot_utility: Optional[PlotUtility] = None
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    @field_validator('title', 'target_chapters', 'target_words_per_chapter', 'characters', mode='before')
+    @classmethod
+    def _not_null(cls, value: Any) -> Any:
+        # These may be left out, but StoryProject has no null for them; an
+        # explicit null would otherwise be $set on the stored project
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+class StoryProjectSummary(BaseModel):
+    """List-view fields of a StoryProject, without its content or chapters"""
+    id: str
+    title: str
+    target_chapters: int = 10
+    target_words_per_chapter: int = 2000
+    current_status: AgentStatusEnum = AgentStatusEnum.pending
+    total_word_count: int = 0
+    created_at: datetime
+    updated_at: datetime
 
 class AgentProgress(BaseModel):
     agent_name: str
@@ -294,6 +383,12 @@ class ChapterContent(BaseModel):
     issues_found: List[str] = []
     issues_fixed: List[str] = []
 
+class SequentialCheckResult(BaseModel):
+    approved: bool = False
+    issues: List[str] = []
+    fixes: List[str] = []
+    revised_content: Optional[str] = None
+
 # API Response Models
 class StoryProjectResponse(BaseModel):
     project: StoryProject
@@ -1,52 +1,134 @@
 import asyncio
+import functools
 import logging
-from typing import Dict, Any
+import os
+import re
+import time
+import orjson
+from concurrent.futures import Executor
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from mistralai import Mistral
+from pymongo import UpdateOne
 from agents import *
 from models import *
 from document_formatter import DocumentFormatter
 
 logger = logging.getLogger(__name__)
 
+CHAPTER_MODEL = "mistral-large-latest"
+
+# Floor on the completion budget per chapter (see chapter_max_tokens for the rest)
+CHAPTER_MIN_TOKENS = 512
+
+# The first line is the title, minus markdown heading / emphasis markers
+# around it and a leading "Chapter N:"; a bare "Chapter N" line has no title
+_TITLE_RE = re.compile(
+    r'^[\s#*_]*(?:Chapter[ \t]*\d+[ \t]*[:\-–.]?[ \t]*)?[*_]*(.*?)[ \t*_]*\n(.*)',
+    re.S | re.I
+)
+
+# Story-so-far passed to each chapter instead of raw previous chapters
+SYNOPSIS_MAX_CHARS = 2000
+SYNOPSIS_ENTRY_MAX_CHARS = 400
+_SENTENCE_RE = re.compile(r'\S[^.!?]*[.!?]+[\'"\u201d]?')
+
+# Mistral batch jobs for chapter drafts (opt-in, see MasterOrchestrator)
+BATCH_POLL_SECONDS = 10
+BATCH_TIMEOUT_SECONDS = 3600
+
+@functools.lru_cache(maxsize=4)
+def _requirements_block(target_words: int) -> str:
+    """Chapter requirements and format instructions; identical across projects for a given length"""
+    return f"""
+        Requirements for each chapter:
+        1. Follow the established plot structure for this chapter
+        2. Maintain character consistency with established profiles
+        3. Follow world rules and maintain atmosphere
+        4. Ensure smooth continuation from previous chapters
+        5. Include rich sensory details, dialogue, and action
+        6. Advance both plot and character development
+        7. Write in a compelling, engaging narrative style
+        8. Target approximately {target_words} words
+        9. End with appropriate tension or resolution for this point in the story
+        
+        Format:
+        - Start with a compelling chapter title
+        - Write the full chapter content
+        - Use proper paragraph breaks and dialogue formatting
+        """
+
 class MasterOrchestrator:
-    def __init__(self, mistral_client: Mistral, db):
+    def __init__(self, mistral_client: Mistral, db, batch_chapters: Optional[bool] = None,
+                 mistral_gate: Optional[MistralGate] = None,
+                 on_project_change: Optional[Callable[[str], None]] = None,
+                 docx_pool: Optional[Executor] = None):
         self.mistral_client = mistral_client
         self.db = db
         
+        # Called with the project id when a run resets, completes or fails the
+        # project, e.g. to invalidate cached reads of it
+        self.on_project_change = on_project_change
+        
+        # One gate for every Mistral chat call made on behalf of any project
+        # (MISTRAL_MAX_CONCURRENT in flight, MISTRAL_RPM per minute)
+        self.mistral_gate = mistral_gate or MistralGate.from_env()
+        
+        # When enabled, all chapter drafts are requested up front in one Mistral
+        # batch job (cheaper, higher throughput) instead of one call per chapter.
+        # Batched drafts are written from the plot structure alone, without the
+        # previous chapters as context; the sequential checker still runs on each.
+        if batch_chapters is None:
+            batch_chapters = os.environ.get("MISTRAL_BATCH_CHAPTERS", "").lower() in ("1", "true", "yes")
+        self.batch_chapters = batch_chapters
+        
         # Initialize all agents
-        self.worldbuilding_agent = WorldbuildingAgent(mistral_client, db)
-        self.character_agent = CharacterAgent(mistral_client, db)
-        self.plot_agent = PlotAgent(mistral_client, db)
-        self.story_generator_agent = StoryGeneratorAgent(mistral_client, db)
-        self.sequential_checker_agent = SequentialCheckerAgent(mistral_client, db)
-        self.document_formatter = DocumentFormatter()
+        self.worldbuilding_agent = WorldbuildingAgent(mistral_client, db, self.mistral_gate)
+        self.character_agent = CharacterAgent(mistral_client, db, self.mistral_gate)
+        self.plot_agent = PlotAgent(mistral_client, db, self.mistral_gate)
+        self.story_generator_agent = StoryGeneratorAgent(mistral_client, db, self.mistral_gate)
+        self.sequential_checker_agent = SequentialCheckerAgent(mistral_client, db, self.mistral_gate)
+        self.document_formatter = DocumentFormatter(docx_pool)
         
     async def orchestrate_story_generation(self, project_id: str) -> Dict[str, Any]:
         """Main orchestration method that coordinates all agents"""
+        # Runs as a background task in a copy of the triggering request's
+        # context; its timestamps must not reuse that request's "now".
+        request_now.set(None)
+        template_task: Optional[asyncio.Task] = None
+        world_task: Optional[asyncio.Task] = None
         try:
-            # Get project data
+            # Nothing is written for a project that does not exist
             project_doc = await self.db.story_projects.find_one({"id": project_id})
             if not project_doc:
                 raise ValueError(f"Project {project_id} not found")
             
-            project = StoryProject(**project_doc)
+            # Initialize agent progress tracking and clear the previous run's
+            # output together; the KDP template is prepared in the background
+            # for Phase 5
+            template_task = asyncio.create_task(self.document_formatter.prepare_template())
+            await asyncio.gather(
+                self._initialize_agent_tracking(project_id),
+                self._reset_generated_chapters(project_id)
+            )
             
-            # Initialize agent progress tracking
-            await self._initialize_agent_tracking(project_id)
+            project = StoryProject(**project_doc)
             
             logger.info(f"Starting story generation orchestration for project {project_id}")
             
             # Phase 1: Worldbuilding Analysis
             logger.info("Phase 1: Worldbuilding Analysis")
-            world_context = await self.worldbuilding_agent.process(
+            world_task = asyncio.create_task(self.worldbuilding_agent.process(
                 project_id, project.worldbuilding
-            )
+            ))
             
             # Phase 2: Character Development
+            # The character agent prepares its prompts while the world call is
+            # still pending and only awaits the world bible right before sending.
             logger.info("Phase 2: Character Development")
             character_context = await self.character_agent.process(
-                project_id, project.characters, world_context
+                project_id, project.characters, world_task
             )
+            world_context = await world_task
             
             # Phase 3: Plot Structure Creation
             logger.info("Phase 3: Plot Structure Creation")
@@ -64,23 +146,26 @@ class MasterOrchestrator:
             
             # Phase 5: Document Formatting
             logger.info("Phase 5: Document Formatting")
+            await template_task
             document_path = await self._format_final_document(
                 project_id, project.title, chapters
             )
             
             # Final update
             total_words = sum(chapter.word_count for chapter in chapters)
+            await self._discard_pending_progress(project_id)
             await self.db.story_projects.update_one(
                 {"id": project_id},
                 {
                     "$set": {
-                        "current_status": AgentStatusEnum.completed.value,
+                        "current_status": AgentStatusEnum.completed.label,
                         "progress_percentage": 100.0,
                         "total_word_count": total_words,
-                        "updated_at": datetime.utcnow()
+                        "updated_at": utcnow()
                     }
                 }
             )
+            self._project_changed(project_id)
             
             logger.info(f"Story generation completed for project {project_id}")
             
@@ -97,20 +182,60 @@ class MasterOrchestrator:
             
         except Exception as e:
             logger.error(f"Orchestration error for project {project_id}: {str(e)}")
+            # Stop the background work first, so nothing it writes (e.g. the
+            # world agent's "completed") lands after the error status
+            background = [task for task in (template_task, world_task) if task is not None]
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
             
             # Update project status to error
+            await self._discard_pending_progress(project_id)
             await self.db.story_projects.update_one(
                 {"id": project_id},
                 {
                     "$set": {
-                        "current_status": AgentStatusEnum.error.value,
-                        "updated_at": datetime.utcnow()
+                        "current_status": AgentStatusEnum.error.label,
+                        "updated_at": utcnow()
                     }
                 }
             )
+            self._project_changed(project_id)
             
             raise
     
+    async def _reset_generated_chapters(self, project_id: str):
+        """Drop chapters and totals left by an earlier run, which chapters are added to
+        
+        Also clears the chapters array that projects generated before the
+        chapters collection still carry, so reads do not fall back to it.
+        """
+        await asyncio.gather(
+            self.db.chapters.delete_many({"project_id": project_id}),
+            self.db.story_projects.update_one(
+                {"id": project_id},
+                {"$set": {"total_word_count": 0, "running_synopsis": "", "chapters": []}}
+            )
+        )
+        self._project_changed(project_id)
+    
+    async def _discard_pending_progress(self, project_id: str):
+        """Drop every agent's throttled running update for a project
+        
+        Runs before the final status is written, so a late "running" write cannot
+        overwrite it; agents that never report completion (the sequential checker)
+        also release their per-project throttler here.
+        """
+        await asyncio.gather(*(
+            agent.discard_progress(project_id)
+            for agent in (self.worldbuilding_agent, self.character_agent, self.plot_agent,
+                          self.story_generator_agent, self.sequential_checker_agent)
+        ))
+    
+    def _project_changed(self, project_id: str):
+        if self.on_project_change:
+            self.on_project_change(project_id)
+    
     async def _initialize_agent_tracking(self, project_id: str):
         """Initialize progress tracking for all agents"""
         agents = [
@@ -122,62 +247,99 @@ class MasterOrchestrator:
             "DocumentFormatter"
         ]
         
-        for agent_name in agents:
-            await self.db.agent_progress.update_one(
-                {"project_id": project_id, "agent_name": agent_name},
-                {
-                    "$set": {
-                        "status": AgentStatusEnum.pending.value,
-                        "progress_percentage": 0.0,
-                        "current_task": None,
-                        "error_message": None,
-                        "created_at": datetime.utcnow()
-                    }
-                },
-                upsert=True
-            )
+        created_at = datetime.now(timezone.utc)
+        await self.db.agent_progress.bulk_write(
+            [
+                UpdateOne(
+                    {"project_id": project_id, "agent_name": agent_name},
+                    {
+                        "$set": {
+                            "status": AgentStatusEnum.pending.label,
+                            "progress_percentage": 0.0,
+                            "current_task": None,
+                            "error_message": None,
+                            "created_at": created_at
+                        }
+                    },
+                    upsert=True
+                )
+                for agent_name in agents
+            ],
+            ordered=False
+        )
     
     async def _generate_and_check_story(self, project_id: str, world_context: Dict, 
                                        character_context: Dict, plot_context: Dict, 
                                        target_words: int) -> List[ChapterContent]:
-        """Generate story with real-time sequential checking"""
-        chapters = []
+        """Generate story with real-time sequential checking
+        
+        Generation and checking are pipelined: chapter N+1 is written while
+        chapter N is being checked. Checks still run strictly in order, each
+        against the checked versions of the chapters before it.
+        """
+        chapters: List[ChapterContent] = []  # checked, in order
+        drafts: List[ChapterContent] = []    # as generated
+        synopsis_entries: List[str] = []     # one per checked chapter
         chapter_count = plot_context.get('chapter_count', 10)
+        check_task: Optional[asyncio.Task] = None
         
-        for chapter_num in range(1, chapter_count + 1):
-            logger.info(f"Generating chapter {chapter_num}/{chapter_count}")
-            
-            # Update story generator progress
-            progress = (chapter_num / chapter_count) * 85
-            await self.story_generator_agent.update_progress(
-                project_id, AgentStatusEnum.running, progress,
-                f"Writing Chapter {chapter_num}"
-            )
-            
-            # Generate single chapter
-            chapter = await self._generate_single_chapter(
-                project_id, chapter_num, chapters, world_context, 
-                character_context, plot_context, target_words
-            )
-            
-            # Sequential check
-            logger.info(f"Sequential checking chapter {chapter_num}")
-            checked_chapter = await self.sequential_checker_agent.check_and_fix_chapter(
-                project_id, chapter, chapters, world_context, character_context
-            )
-            
-            chapters.append(checked_chapter)
+        # Identical for every chapter, so built once per story
+        header = self._build_static_header(world_context, character_context, plot_context, target_words)
+        max_tokens = max(CHAPTER_MIN_TOKENS, chapter_max_tokens(target_words))
+        
+        batch_drafts: Dict[int, str] = {}
+        if self.batch_chapters:
+            batch_drafts = await self._batch_generate_chapters(project_id, [
+                (chapter_num, self._chapter_request(
+                    chapter_num, chapter_count, "", header, target_words, max_tokens
+                ))
+                for chapter_num in range(1, chapter_count + 1)
+            ])
+        
+        try:
+            for chapter_num in range(1, chapter_count + 1):
+                logger.info(f"Generating chapter {chapter_num}/{chapter_count}")
+                
+                # Update story generator progress
+                progress = (chapter_num - 1) / chapter_count * 85
+                await self.story_generator_agent.update_progress(
+                    project_id, AgentStatusEnum.running, progress,
+                    f"Writing Chapter {chapter_num}"
+                )
+                
+                # Generate single chapter; the previous chapter may still be in
+                # its check, so its draft stands in for it in the synopsis
+                if chapter_num in batch_drafts:
+                    chapter = self._parse_chapter(chapter_num, batch_drafts[chapter_num])
+                else:
+                    story_so_far = self._running_synopsis(synopsis_entries + [
+                        self._chapter_synopsis(draft) for draft in drafts[len(chapters):]
+                    ])
+                    chapter = await self._generate_single_chapter(
+                        project_id, chapter_num, chapter_count,
+                        story_so_far, header, target_words, max_tokens
+                    )
+                drafts.append(chapter)
+                
+                if check_task:
+                    await check_task
+                check_task = asyncio.create_task(self._check_and_store_chapter(
+                    project_id, chapter, chapters, synopsis_entries,
+                    world_context, character_context
+                ))
             
-            # Update project with new chapter
-            await self.db.story_projects.update_one(
-                {"id": project_id},
-                {
-                    "$push": {"chapters": checked_chapter.dict()},
-                    "$inc": {"total_word_count": checked_chapter.word_count}
-                }
-            )
+            if check_task:
+                await check_task
             
-            logger.info(f"Chapter {chapter_num} completed. Sequential check: {'PASSED' if checked_chapter.sequential_check_passed else 'ISSUES FIXED'}")
+            # Persist the chapters still buffered by _check_and_store_chapter
+            unsaved = chapters[len(chapters) - len(chapters) % CHAPTER_WRITE_BATCH:]
+            if unsaved:
+                await self.story_generator_agent.save_chapters(
+                    project_id, unsaved, self._running_synopsis(synopsis_entries)
+                )
+        finally:
+            if check_task and not check_task.done():
+                check_task.cancel()
         
         # Mark story generation as completed
         await self.story_generator_agent.update_progress(
@@ -186,76 +348,130 @@ class MasterOrchestrator:
         
         return chapters
     
-    async def _generate_single_chapter(self, project_id: str, chapter_num: int, 
-                                     previous_chapters: List[ChapterContent],
-                                     world_context: Dict, character_context: Dict, 
-                                     plot_context: Dict, target_words: int) -> ChapterContent:
-        """Generate a single chapter"""
+    async def _check_and_store_chapter(self, project_id: str, chapter: ChapterContent,
+                                       chapters: List[ChapterContent], synopsis_entries: List[str],
+                                       world_context: Dict, character_context: Dict):
+        """Sequentially check a chapter, then append it to chapters, the synopsis and the project"""
+        logger.info(f"Sequential checking chapter {chapter.chapter_number}")
+        checked_chapter = await self.sequential_checker_agent.check_and_fix_chapter(
+            project_id, chapter, chapters, world_context, character_context
+        )
         
-        # Create context summary
-        previous_summary = ""
-        if previous_chapters:
-            previous_summary = "PREVIOUS CHAPTERS SUMMARY:\n"
-            for ch in previous_chapters[-2:]:  # Last 2 chapters for context
-                previous_summary += f"Chapter {ch.chapter_number}: {ch.title}\n"
-                previous_summary += f"Key events: {ch.content[:200]}...\n\n"
+        chapters.append(checked_chapter)
+        synopsis_entries.append(self._chapter_synopsis(checked_chapter))
         
-        chapter_prompt = f"""
-        Write Chapter {chapter_num} of {plot_context.get('chapter_count', 10)} for this story.
+        # Update project with new chapters, CHAPTER_WRITE_BATCH at a time
+        if len(chapters) % CHAPTER_WRITE_BATCH == 0:
+            await self.story_generator_agent.save_chapters(
+                project_id, chapters[-CHAPTER_WRITE_BATCH:],
+                self._running_synopsis(synopsis_entries)
+            )
         
-        WORLD CONTEXT:
-        {world_context.get('world_bible', '')}
+        logger.info(f"Chapter {chapter.chapter_number} completed. Sequential check: {'PASSED' if checked_chapter.sequential_check_passed else 'ISSUES FIXED'}")
+    
+    async def _generate_single_chapter(self, project_id: str, chapter_num: int, chapter_count: int,
+                                     story_so_far: str, header: str, target_words: int,
+                                     max_tokens: int) -> ChapterContent:
+        """Generate a single chapter, reporting live progress while it streams"""
+        request = self._chapter_request(
+            chapter_num, chapter_count, story_so_far, header, target_words, max_tokens
+        )
         
-        CHARACTER PROFILES:
-        {json.dumps(character_context.get('character_profiles', {}), indent=2)[:1000]}...
+        async def report_words(words: int):
+            progress = (chapter_num - 1 + min(words / target_words, 1.0)) / chapter_count * 85
+            await self.story_generator_agent.update_progress(
+                project_id, AgentStatusEnum.running, progress,
+                f"Writing Chapter {chapter_num} (~{words} words)"
+            )
         
-        PLOT STRUCTURE:
-        {plot_context.get('plot_structure', '')}
+        # Streams through the shared gate with the agents' retry policy
+        chapter_content = await self.story_generator_agent._stream_complete(
+            on_progress=report_words, **request
+        )
+        return self._parse_chapter(chapter_num, chapter_content)
+    
+    def _chapter_request(self, chapter_num: int, chapter_count: int, story_so_far: str,
+                         header: str, target_words: int, max_tokens: int) -> Dict[str, Any]:
+        """Build the chat completion request for one chapter around the story header"""
         
-        {previous_summary}
+        # Create context summary
+        previous_summary = f"STORY SO FAR:\n{story_so_far}" if story_so_far else ""
         
-        TARGET WORD COUNT: {target_words} words
+        chapter_prompt = f"""
+        Write Chapter {chapter_num} of {chapter_count} for this story.
         
-        Requirements for Chapter {chapter_num}:
-        1. Follow the established plot structure for this chapter
-        2. Maintain character consistency with established profiles
-        3. Follow world rules and maintain atmosphere
-        4. Ensure smooth continuation from previous chapters
-        5. Include rich sensory details, dialogue, and action
-        6. Advance both plot and character development
-        7. Write in a compelling, engaging narrative style
-        8. Target approximately {target_words} words
-        9. End with appropriate tension or resolution for this point in the story
+        {previous_summary}
         
-        Format:
-        - Start with a compelling chapter title
-        - Write the full chapter content
-        - Use proper paragraph breaks and dialogue formatting
+        TARGET WORD COUNT: {target_words} words
         
         Write Chapter {chapter_num} now:
         """
         
-        response = await self.mistral_client.chat.complete_async(
-            model="mistral-large-latest",
-            messages=[{"role": "user", "content": chapter_prompt}],
-            max_tokens=min(4000, target_words // 100 * 150),
-            temperature=0.7
-        )
+        # The story-invariant header goes first as the system message, so
+        # every chapter request shares the same prompt prefix.
+        return {
+            "model": CHAPTER_MODEL,
+            "messages": [
+                {"role": "system", "content": header},
+                {"role": "user", "content": chapter_prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
+    
+    def _build_static_header(self, world_context: Dict, character_context: Dict,
+                             plot_context: Dict, target_words: int) -> str:
+        """Context and instructions shared by every chapter of a story"""
+        # Compact, key-sorted JSON: fewer tokens than indent=2 within the
+        # same 1000-character budget, and orjson handles the datetimes
+        profiles_json = orjson.dumps(
+            character_context.get('character_profiles', {}), option=orjson.OPT_SORT_KEYS
+        ).decode()[:1000]
+        return f"""
+        You are writing a novel chapter by chapter.
         
-        chapter_content = response.choices[0].message.content
+        WORLD CONTEXT:
+        {world_context.get('world_bible', '')}
         
-        # Extract title and content
-        lines = chapter_content.split('\n', 2)
-        title = lines[0].strip().replace('#', '').replace('Chapter', '').replace(str(chapter_num), '').replace(':', '').strip()
-        if not title:
-            title = f"Chapter {chapter_num}"
+        CHARACTER PROFILES:
+        {profiles_json}...
         
-        content = lines[1].strip() if len(lines) > 1 else chapter_content
-        if len(lines) > 2:
-            content = '\n'.join(lines[1:]).strip()
+        PLOT STRUCTURE:
+        {plot_context.get('plot_structure', '')}
+        """ + _requirements_block(target_words)
+    
+    def _chapter_synopsis(self, chapter: ChapterContent) -> str:
+        """One-line synopsis of a chapter: its title plus first and last sentence"""
+        sentences = _SENTENCE_RE.findall(chapter.content)
+        if len(sentences) > 1:
+            events = f"{sentences[0]} ... {sentences[-1]}"
+        else:
+            events = sentences[0] if sentences else chapter.content
+        return f"Chapter {chapter.chapter_number}: {chapter.title} - {events}"[:SYNOPSIS_ENTRY_MAX_CHARS]
+    
+    def _running_synopsis(self, entries: List[str]) -> str:
+        """The most recent synopsis entries that fit in SYNOPSIS_MAX_CHARS"""
+        kept, size = [], 0
+        for entry in reversed(entries):
+            size += len(entry) + 1
+            if size > SYNOPSIS_MAX_CHARS:
+                break
+            kept.append(entry)
+        return "\n".join(reversed(kept))
+    
+    def _parse_chapter(self, chapter_num: int, chapter_content: str) -> ChapterContent:
+        """Split a generated chapter into title and content"""
+        # Extract title and content (see _TITLE_RE)
+        match = _TITLE_RE.match(chapter_content)
+        if match:
+            title = match.group(1) or f"Chapter {chapter_num}"
+            content = match.group(2).strip()
+        else:
+            title = f"Chapter {chapter_num}"
+            content = chapter_content.strip()
         
         # Count words
-        word_count = len(content.split())
+        word_count = count_words(content)
         
         return ChapterContent(
             chapter_number=chapter_num,
@@ -264,6 +480,68 @@ class MasterOrchestrator:
             word_count=word_count
         )
     
+    async def _batch_generate_chapters(self, project_id: str,
+                                       requests: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, str]:
+        """Run chapter requests as one Mistral batch job
+        
+        Returns the generated content by chapter number. Chapters missing from
+        the result (or all of them, if the job fails) fall back to the regular
+        per-chapter path.
+        """
+        try:
+            batch_input = b"\n".join(
+                orjson.dumps({
+                    "custom_id": f"ch-{chapter_num}",
+                    "body": {key: value for key, value in request.items() if key != "model"}
+                })
+                for chapter_num, request in requests
+            )
+            batch_file = await self.mistral_client.files.upload_async(
+                file={"file_name": f"{project_id}-chapters.jsonl", "content": batch_input},
+                purpose="batch"
+            )
+            job = await self.mistral_client.batch.jobs.create_async(
+                input_files=[batch_file.id],
+                model=CHAPTER_MODEL,
+                endpoint="/v1/chat/completions",
+                metadata={"project_id": project_id}
+            )
+            logger.info(f"Submitted chapter batch job {job.id} for project {project_id}")
+            
+            deadline = time.monotonic() + BATCH_TIMEOUT_SECONDS
+            while job.status in ("QUEUED", "RUNNING"):
+                if time.monotonic() > deadline:
+                    await self.mistral_client.batch.jobs.cancel_async(job_id=job.id)
+                    raise TimeoutError(f"batch job {job.id} did not finish in {BATCH_TIMEOUT_SECONDS}s")
+                await asyncio.sleep(BATCH_POLL_SECONDS)
+                job = await self.mistral_client.batch.jobs.get_async(job_id=job.id)
+            
+            if job.status != "SUCCESS" or not job.output_file:
+                raise RuntimeError(f"batch job {job.id} ended with status {job.status}")
+            
+            output = await self.mistral_client.files.download_async(file_id=job.output_file)
+            try:
+                output_lines = (await output.aread()).splitlines()
+            finally:
+                await output.aclose()
+            
+            drafts = {}
+            for line in output_lines:
+                record = orjson.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                chapter_num = int(record["custom_id"].removeprefix("ch-"))
+                drafts[chapter_num] = response["body"]["choices"][0]["message"]["content"]
+            
+            logger.info(f"Chapter batch job {job.id}: {len(drafts)}/{len(requests)} chapters generated")
+            return drafts
+        
+        except Exception as e:
+            logger.warning(f"Chapter batch generation failed for project {project_id}, "
+                           f"falling back to per-chapter calls: {str(e)}")
+            return {}
+    
     async def _format_final_document(self, project_id: str, title: str, 
                                    chapters: List[ChapterContent]) -> str:
         """Format the final document for KDP"""
@@ -284,26 +562,59 @@ class MasterOrchestrator:
     async def get_project_progress(self, project_id: str) -> Dict[str, Any]:
         """Get current progress of a project"""
         try:
-            # Get project status
-            project_doc = await self.db.story_projects.find_one({"id": project_id})
-            if not project_doc:
+            # Project status, its agents' progress and its chapter count in one
+            # round-trip; only chapter ids are looked up, not their content
+            pipeline = [
+                {"$match": {"id": project_id}},
+                {"$lookup": {
+                    "from": "agent_progress",
+                    "let": {"project_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$project_id", "$$project_id"]}}},
+                        {"$project": {"_id": 0, **{field: 1 for field in AgentProgress.model_fields}}}
+                    ],
+                    "as": "agents"
+                }},
+                {"$lookup": {
+                    "from": "chapters",
+                    "let": {"project_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$project_id", "$$project_id"]}}},
+                        {"$project": {"_id": 1}}
+                    ],
+                    "as": "chapter_ids"
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "current_status": 1,
+                    "progress_percentage": 1,
+                    "current_agent": 1,
+                    # Projects generated before the chapters collection keep theirs embedded
+                    "total_chapters": {"$cond": [
+                        {"$gt": [{"$size": "$chapter_ids"}, 0]},
+                        {"$size": "$chapter_ids"},
+                        {"$size": {"$ifNull": ["$chapters", []]}}
+                    ]},
+                    "total_word_count": 1,
+                    "agents": 1
+                }}
+            ]
+            cursor = await self.db.story_projects.aggregate(pipeline)
+            docs = await cursor.to_list(1)
+            if not docs:
                 return {"error": "Project not found"}
+            project_doc = docs[0]
             
-            # Get agent progress
-            agent_progress_docs = await self.db.agent_progress.find(
-                {"project_id": project_id}
-            ).to_list(None)
-            
-            agent_progress = [AgentProgress(**doc) for doc in agent_progress_docs]
-            
+            # agent_progress documents are written in AgentProgress's shape, so
+            # they are returned as stored rather than rebuilt as models
             return {
                 "project_id": project_id,
                 "overall_status": project_doc.get("current_status", "pending"),
                 "overall_progress": project_doc.get("progress_percentage", 0.0),
                 "current_agent": project_doc.get("current_agent"),
-                "total_chapters": len(project_doc.get("chapters", [])),
+                "total_chapters": project_doc["total_chapters"],
                 "total_words": project_doc.get("total_word_count", 0),
-                "agents_progress": [progress.dict() for progress in agent_progress]
+                "agents_progress": project_doc["agents"]
             }
         
         except Exception as e:
@@ -1,26 +1,38 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, ORJSONResponse
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, ReturnDocument
+from cachetools import TTLCache
+import asyncio
+import httpx
 import os
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import logging.config
+import multiprocessing
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Set
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from mistralai import Mistral
 
 # Import our models and agents
 from models import *
+from agents import LLM_CACHE_TTL_SECONDS, MistralGate, chapter_preview
 from orchestrator import MasterOrchestrator
+from document_formatter import GENERATED_BOOKS_DIR, kdp_document_filename, legacy_kdp_document_filename
 
 # Legacy models for backward compatibility
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utcnow)
 
 class StatusCheckCreate(BaseModel):
     client_name: str
@@ -29,6 +41,14 @@ class StoryRequest(BaseModel):
     prompt: str
     max_tokens: Optional[int] = 1000
     temperature: Optional[float] = 0.7
+    
+    @field_validator('max_tokens')
+    @classmethod
+    def _positive_max_tokens(cls, v: Optional[int]) -> Optional[int]:
+        # A zero budget would come back as an empty completion
+        if v is not None and v < 1:
+            raise ValueError('max_tokens must be at least 1')
+        return v
 
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
@@ -44,7 +64,7 @@ class Story(BaseModel):
     title: str
     content: str
     prompt: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
 
 class StoryCreate(BaseModel):
     title: str
@@ -54,19 +74,102 @@ class StoryCreate(BaseModel):
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection: one client (and connection pool) for the whole process.
+# PyMongo's native asyncio client, without Motor's thread-pool hop per call.
+# minPoolSize keeps warm connections for the orchestrator's bursts of writes;
+# the cap is sized to realistic concurrency rather than the driver's 100.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', 20)),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 5)),
+    maxIdleTimeMS=60000,
+    serverSelectionTimeoutMS=5000,
+    retryWrites=True
+)
 db = client[os.environ['DB_NAME']]
 
-# Mistral AI client
-mistral_client = Mistral(api_key=os.environ['MISTRAL_API_KEY'])
+def get_db():
+    """The shared database handle; use this rather than creating another client"""
+    return db
+
+# Mistral AI client, on one pooled HTTP client shared by every Mistral call
+# (agents, orchestrator and the legacy routes) so connections stay warm
+mistral_http = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    timeout=120
+)
+mistral_client = Mistral(api_key=os.environ['MISTRAL_API_KEY'], async_client=mistral_http)
+
+# Concurrency/rate limit for all Mistral chat calls made by this process
+mistral_gate = MistralGate.from_env()
+
+# Short-lived cache of the project reads the UI polls (project, preview),
+# keyed by (route, project_id). Entries are dropped when a project is updated,
+# deleted, or a generation run resets or finishes it; progress written during
+# a run shows up once an entry expires.
+PROJECT_CACHE_TTL_SECONDS = 5
+_project_cache: TTLCache = TTLCache(maxsize=1024, ttl=PROJECT_CACHE_TTL_SECONDS)
+
+def invalidate_project_cache(project_id: str):
+    _project_cache.pop(("project", project_id), None)
+    _project_cache.pop(("preview", project_id), None)
+
+# Worker processes that render .docx chapters, kept off the event loop's
+# process; workers start on first use and are stopped on shutdown. They are
+# spawned, not forked: by first use this process runs an event loop and
+# worker threads, whose held locks a forked child would inherit.
+DOCX_WORKERS = 2
+docx_pool = ProcessPoolExecutor(max_workers=DOCX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
 
 # Master Orchestrator
-orchestrator = MasterOrchestrator(mistral_client, db)
+orchestrator = MasterOrchestrator(
+    mistral_client, db, mistral_gate=mistral_gate,
+    on_project_change=invalidate_project_cache, docx_pool=docx_pool
+)
 
-# Create the main app without a prefix
-app = FastAPI()
+# Create the main app without a prefix. Responses are rendered with orjson.
+# uvicorn's default --loop auto / --http auto pick up uvloop and httptools
+# (see requirements.txt), so no loop policy is installed here.
+app = FastAPI(default_response_class=ORJSONResponse)
+
+@app.middleware("http")
+async def request_timestamp(request: Request, call_next):
+    """Take one timestamp per request, shared by every model default created while handling it"""
+    token = request_now.set(datetime.now(timezone.utc))
+    try:
+        return await call_next(request)
+    finally:
+        request_now.reset(token)
+
+# Errors escaping a route are turned into responses here, once, instead of
+# every route wrapping its body in try/except. HTTPExceptions raised by
+# routes keep their own status codes; request bodies are validated by their
+# models (422), so any other exception, a KeyError or pydantic ValidationError
+# from stored data included, is a logged 500.
+# FastAPI's own handlers for these render with the stdlib-json JSONResponse;
+# same responses, through orjson like every other route
+@app.exception_handler(StarletteHTTPException)
+async def http_error_handler(request: Request, exc: StarletteHTTPException):
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_handler(request: Request, exc: RequestValidationError):
+    return ORJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
+
+# Unhandled errors are caught by a middleware rather than an Exception
+# handler: Starlette runs Exception handlers in ServerErrorMiddleware, outside
+# CORSMiddleware, so those 500s would go out without CORS headers
+@app.middleware("http")
+async def unhandled_error_response(request: Request, call_next):
+    try:
+        return await call_next(request)
+    except Exception as exc:
+        logger.error(f"Unhandled error on {request.method} {request.url.path}: {exc!r}")
+        return ORJSONResponse({"detail": str(exc)}, status_code=500)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -78,216 +181,225 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    # Documents were validated by StatusCheck on insert; returning a response
+    # directly skips re-validating every one (response_model stays for the docs)
+    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+    return ORJSONResponse(status_checks)
 
 # Story Project Management Routes
 @api_router.post("/projects", response_model=StoryProject)
-async def create_story_project(project_data: dict):
+async def create_story_project(project_data: ProjectCreate):
     """Create a new story project"""
-    try:
-        # Parse the project data
-        project = StoryProject(
-            title=project_data["title"],
-            target_chapters=project_data.get("target_chapters", 10),
-            target_words_per_chapter=project_data.get("target_words_per_chapter", 2000)
-        )
-        
-        # Parse worldbuilding if provided
-        if "worldbuilding" in project_data:
-            project.worldbuilding = WorldbuildingContext(**project_data["worldbuilding"])
-        
-        # Parse characters if provided
-        if "characters" in project_data:
-            project.characters = [Character(**char_data) for char_data in project_data["characters"]]
-        
-        # Parse plot utility if provided
-        if "plot_utility" in project_data:
-            project.plot_utility = PlotUtility(**project_data["plot_utility"])
-        
-        # Save to database
-        await db.story_projects.insert_one(project.dict())
-        
-        return project
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error creating project: {str(e)}")
-
-@api_router.get("/projects", response_model=List[StoryProject])
+    # The body is already parsed and validated, nested models included
+    project = StoryProject(**dict(project_data))
+    
+    # Save to database
+    await db.story_projects.insert_one(project.model_dump())
+    
+    return project
+
+# Fields returned by the project list; chapters and story content stay in the database
+_PROJECT_SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in StoryProjectSummary.model_fields}}
+
+# Chapter documents as returned to clients (without their storage keys)
+_CHAPTER_PROJECTION = {"_id": 0, "project_id": 0, "preview": 0}
+
+# Chapters in the preview route: the preview stored at write time, no content
+_CHAPTER_PREVIEW_PROJECTION = {"_id": 0, "chapter_number": 1, "title": 1, "word_count": 1, "preview": 1}
+
+def _with_legacy_chapters(chapters: List[Dict[str, Any]], project: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Chapters from the chapters collection, or for projects generated before
+    it existed, the chapters array embedded in the project document"""
+    return chapters or project.get("chapters") or []
+
+@api_router.get("/projects", response_model=List[StoryProjectSummary])
 async def get_story_projects():
-    """Get all story projects"""
-    projects = await db.story_projects.find().sort("created_at", -1).to_list(100)
-    return [StoryProject(**project) for project in projects]
+    """Get all story projects (summary fields only)"""
+    projects = await db.story_projects.find({}, _PROJECT_SUMMARY_PROJECTION).sort("created_at", -1).to_list(100)
+    return ORJSONResponse(projects)
 
 @api_router.get("/projects/{project_id}", response_model=StoryProject)
 async def get_story_project(project_id: str):
     """Get a specific story project"""
-    project = await db.story_projects.find_one({"id": project_id})
+    cached = _project_cache.get(("project", project_id))
+    if cached is not None:
+        return ORJSONResponse(cached)
+    
+    # Written by StoryProject, so returned as stored rather than re-validated
+    project, chapters = await asyncio.gather(
+        db.story_projects.find_one({"id": project_id}, {"_id": 0}),
+        db.chapters.find({"project_id": project_id}, _CHAPTER_PROJECTION).sort("chapter_number", 1).to_list(None)
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return StoryProject(**project)
+    project["chapters"] = _with_legacy_chapters(chapters, project)
+    _project_cache[("project", project_id)] = project
+    return ORJSONResponse(project)
 
 @api_router.put("/projects/{project_id}", response_model=StoryProject)
-async def update_story_project(project_id: str, project_data: dict):
+async def update_story_project(project_id: str, project_data: ProjectUpdate):
     """Update a story project"""
-    try:
-        # Get existing project
-        existing_project = await db.story_projects.find_one({"id": project_id})
-        if not existing_project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        # Update fields
-        update_data = {
-            "updated_at": datetime.utcnow()
-        }
-        
-        if "title" in project_data:
-            update_data["title"] = project_data["title"]
-        if "target_chapters" in project_data:
-            update_data["target_chapters"] = project_data["target_chapters"]
-        if "target_words_per_chapter" in project_data:
-            update_data["target_words_per_chapter"] = project_data["target_words_per_chapter"]
-        if "worldbuilding" in project_data:
-            update_data["worldbuilding"] = project_data["worldbuilding"]
-        if "characters" in project_data:
-            update_data["characters"] = [char for char in project_data["characters"]]
-        if "plot_utility" in project_data:
-            update_data["plot_utility"] = project_data["plot_utility"]
-        
-        await db.story_projects.update_one(
+    # Only the fields present in the request are changed
+    update_data = project_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = utcnow()
+    
+    # Update and read back the updated project in one round-trip, alongside its chapters
+    updated_project, chapters = await asyncio.gather(
+        db.story_projects.find_one_and_update(
             {"id": project_id},
-            {"$set": update_data}
-        )
-        
-        # Return updated project
-        updated_project = await db.story_projects.find_one({"id": project_id})
-        return StoryProject(**updated_project)
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error updating project: {str(e)}")
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        ),
+        db.chapters.find({"project_id": project_id}, _CHAPTER_PROJECTION).sort("chapter_number", 1).to_list(None)
+    )
+    if updated_project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    invalidate_project_cache(project_id)
+    updated_project["chapters"] = _with_legacy_chapters(chapters, updated_project)
+    return StoryProject(**updated_project)
 
 @api_router.delete("/projects/{project_id}")
 async def delete_story_project(project_id: str):
     """Delete a story project"""
-    result = await db.story_projects.delete_one({"id": project_id})
+    # The project and its related data are independent, so delete them together
+    result, _, _ = await asyncio.gather(
+        db.story_projects.delete_one({"id": project_id}),
+        db.agent_progress.delete_many({"project_id": project_id}),
+        db.chapters.delete_many({"project_id": project_id})
+    )
+    invalidate_project_cache(project_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Also delete related data
-    await db.agent_progress.delete_many({"project_id": project_id})
-    
     return {"success": True, "message": "Project deleted"}
 
 # Story Generation Routes
+# Generation runs outlive the request that starts them; hold a reference to
+# each task until it finishes so it is not garbage-collected mid-run
+_running_tasks: Set[asyncio.Task] = set()
+
+def _generation_done(task: asyncio.Task):
+    _running_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Story generation task failed: {task.exception()!r}")
+
 @api_router.post("/projects/{project_id}/generate")
-async def start_story_generation(project_id: str, background_tasks: BackgroundTasks):
+async def start_story_generation(project_id: str):
     """Start the story generation process"""
-    try:
-        # Check if project exists
-        project = await db.story_projects.find_one({"id": project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        # Check if generation is already in progress
-        if project.get("current_status") == "running":
-            raise HTTPException(status_code=400, detail="Generation already in progress")
-        
-        # Start generation in background
-        background_tasks.add_task(
-            orchestrator.orchestrate_story_generation, 
-            project_id
-        )
-        
-        return {
-            "success": True,
-            "message": "Story generation started",
-            "project_id": project_id
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting generation: {str(e)}")
+    # Check if project exists
+    project = await db.story_projects.find_one({"id": project_id}, {"_id": 0, "current_status": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Check if generation is already in progress
+    if project.get("current_status") == "running":
+        raise HTTPException(status_code=400, detail="Generation already in progress")
+    
+    # Start generation as its own task, independent of this response
+    task = asyncio.create_task(orchestrator.orchestrate_story_generation(project_id))
+    _running_tasks.add(task)
+    task.add_done_callback(_generation_done)
+    
+    return {
+        "success": True,
+        "message": "Story generation started",
+        "project_id": project_id
+    }
 
 @api_router.get("/projects/{project_id}/progress")
 async def get_generation_progress(project_id: str):
     """Get the progress of story generation"""
-    try:
-        progress_data = await orchestrator.get_project_progress(project_id)
-        return progress_data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting progress: {str(e)}")
+    progress_data = await orchestrator.get_project_progress(project_id)
+    return progress_data
 
 @api_router.get("/projects/{project_id}/preview")
 async def get_story_preview(project_id: str):
     """Get a preview of the generated story"""
-    try:
-        project = await db.story_projects.find_one({"id": project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        chapters = project.get("chapters", [])
-        if not chapters:
-            raise HTTPException(status_code=404, detail="No chapters generated yet")
-        
-        # Return preview data
-        return {
-            "project_id": project_id,
-            "title": project["title"],
-            "total_chapters": len(chapters),
-            "total_words": project.get("total_word_count", 0),
-            "chapters": [
-                {
-                    "chapter_number": ch["chapter_number"],
-                    "title": ch["title"],
-                    "word_count": ch["word_count"],
-                    "preview": ch["content"][:300] + "..." if len(ch["content"]) > 300 else ch["content"]
-                }
-                for ch in chapters
-            ]
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting preview: {str(e)}")
+    cached = _project_cache.get(("preview", project_id))
+    if cached is not None:
+        return cached
+    
+    project, chapters = await asyncio.gather(
+        db.story_projects.find_one({"id": project_id}, {"_id": 0, "title": 1, "total_word_count": 1, "chapters": 1}),
+        db.chapters.find({"project_id": project_id}, _CHAPTER_PREVIEW_PROJECTION).sort("chapter_number", 1).to_list(None)
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if not chapters:
+        chapters = [
+            {
+                "chapter_number": chapter["chapter_number"],
+                "title": chapter["title"],
+                "word_count": chapter["word_count"],
+                "preview": chapter_preview(chapter["content"])
+            }
+            for chapter in _with_legacy_chapters(chapters, project)
+        ]
+    if not chapters:
+        raise HTTPException(status_code=404, detail="No chapters generated yet")
+    
+    # Return preview data
+    preview = {
+        "project_id": project_id,
+        "title": project["title"],
+        "total_chapters": len(chapters),
+        "total_words": project.get("total_word_count", 0),
+        "chapters": chapters
+    }
+    _project_cache[("preview", project_id)] = preview
+    return preview
 
 @api_router.get("/projects/{project_id}/download")
-async def download_story_document(project_id: str):
+async def download_story_document(project_id: str, request: Request):
     """Download the complete story as a KDP-ready Word document"""
-    try:
-        project = await db.story_projects.find_one({"id": project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        if project.get("current_status") != "completed":
-            raise HTTPException(status_code=400, detail="Story generation not completed")
-        
-        # Check if document exists
-        title = project["title"]
-        filename = f"{title.replace(' ', '_').replace('/', '_')}_{project_id}.docx"
-        filepath = f"/app/backend/generated_books/{filename}"
-        
-        if not os.path.exists(filepath):
-            raise HTTPException(status_code=404, detail="Document not found. Please regenerate the story.")
-        
-        return FileResponse(
-            path=filepath,
-            filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error downloading document: {str(e)}")
+    project = await db.story_projects.find_one({"id": project_id}, {"_id": 0, "title": 1, "current_status": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if project.get("current_status") != "completed":
+        raise HTTPException(status_code=400, detail="Story generation not completed")
+    
+    # Check if document exists; documents generated before the current file
+    # naming keep their old name. One stat per candidate serves the existence
+    # check, the ETag and FileResponse's own headers.
+    title = project["title"]
+    for filename in (kdp_document_filename(title, project_id),
+                     legacy_kdp_document_filename(title, project_id)):
+        filepath = os.path.join(GENERATED_BOOKS_DIR, filename)
+        try:
+            stat_result = os.stat(filepath)
+            break
+        except FileNotFoundError:
+            continue
+    else:
+        raise HTTPException(status_code=404, detail="Document not found. Please regenerate the story.")
+    
+    # A regenerated document gets a new mtime/size and so a new ETag
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return FileResponse(
+        path=filepath,
+        filename=filename,
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        headers={"Content-Disposition": f"attachment; filename={filename}", "ETag": etag},
+        stat_result=stat_result
+    )
 
 # Legacy Chat and Story Generation Routes (for backward compatibility)
 @api_router.post("/generate-story")
 async def generate_story(request: StoryRequest):
-    try:
+    async with mistral_gate:
         response = await mistral_client.chat.complete_async(
             model="mistral-large-latest",
             messages=[
@@ -299,21 +411,18 @@ async def generate_story(request: StoryRequest):
             max_tokens=request.max_tokens,
             temperature=request.temperature
         )
-        
-        generated_content = response.choices[0].message.content
-        
-        return {
-            "success": True,
-            "story": generated_content,
-            "prompt": request.prompt
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Story generation failed: {str(e)}")
+    
+    generated_content = response.choices[0].message.content
+    
+    return {
+        "success": True,
+        "story": generated_content,
+        "prompt": request.prompt
+    }
 
 @api_router.post("/complete-story")
 async def complete_story(request: StoryRequest):
-    try:
+    async with mistral_gate:
         response = await mistral_client.chat.complete_async(
             model="mistral-large-latest",
             messages=[
@@ -325,60 +434,54 @@ async def complete_story(request: StoryRequest):
             max_tokens=request.max_tokens,
             temperature=request.temperature
         )
-        
-        completion = response.choices[0].message.content
-        
-        return {
-            "success": True,
-            "completion": completion,
-            "original": request.prompt
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Story completion failed: {str(e)}")
+    
+    completion = response.choices[0].message.content
+    
+    return {
+        "success": True,
+        "completion": completion,
+        "original": request.prompt
+    }
 
 @api_router.post("/chat")
 async def chat_with_mistral(request: ChatRequest):
-    try:
-        mistral_messages = [
-            {"role": msg.role, "content": msg.content} for msg in request.messages
-        ]
-        
+    mistral_messages = [
+        {"role": msg.role, "content": msg.content} for msg in request.messages
+    ]
+    
+    async with mistral_gate:
         response = await mistral_client.chat.complete_async(
             model="mistral-large-latest",
             messages=mistral_messages,
             max_tokens=request.max_tokens,
             temperature=request.temperature
         )
-        
-        assistant_response = response.choices[0].message.content
-        
-        return {
-            "success": True,
-            "response": assistant_response
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+    
+    assistant_response = response.choices[0].message.content
+    
+    return {
+        "success": True,
+        "response": assistant_response
+    }
 
 # Legacy Story Management Routes
 @api_router.post("/stories", response_model=Story)
 async def save_story(story: StoryCreate):
-    story_obj = Story(**story.dict())
-    await db.stories.insert_one(story_obj.dict())
+    story_obj = Story(**story.model_dump())
+    await db.stories.insert_one(story_obj.model_dump())
     return story_obj
 
 @api_router.get("/stories", response_model=List[Story])
 async def get_stories():
-    stories = await db.stories.find().sort("created_at", -1).to_list(100)
-    return [Story(**story) for story in stories]
+    stories = await db.stories.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
+    return ORJSONResponse(stories)
 
 @api_router.get("/stories/{story_id}", response_model=Story)
 async def get_story(story_id: str):
-    story = await db.stories.find_one({"id": story_id})
+    story = await db.stories.find_one({"id": story_id}, {"_id": 0})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    return Story(**story)
+    return ORJSONResponse(story)
 
 @api_router.delete("/stories/{story_id}")
 async def delete_story(story_id: str):
@@ -398,16 +501,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-# Create required directories
-os.makedirs("/app/backend/generated_books", exist_ok=True)
+# Root logging for the app's own loggers; applied at startup. Loggers created
+# at import time (agents, orchestrator, this module) must stay enabled.
+LOGGING_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"}
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"}
+    },
+    "root": {"level": "INFO", "handlers": ["console"]}
+}
+
+@app.on_event("startup")
+async def configure_process():
+    # Process setup happens here, once per worker at startup, rather than as
+    # side effects of importing this module
+    logging.config.dictConfig(LOGGING_CONFIG)
+    Path(GENERATED_BOOKS_DIR).mkdir(parents=True, exist_ok=True)
+
+@app.on_event("startup")
+async def warm_db_pool():
+    # Fail fast on a bad MONGO_URL and open the first pooled connection
+    await db.command("ping")
+
+@app.on_event("startup")
+async def ensure_indexes():
+    # Every route and orchestration step looks documents up by id/project_id;
+    # create_index is a no-op when the index already exists. The
+    # (project_id, agent_name) index also serves project_id-only queries
+    # such as the agent_progress cleanup on delete. The llm_cache TTL index
+    # keeps the response cache from growing without bound.
+    await asyncio.gather(
+        db.story_projects.create_index("id", unique=True),
+        db.story_projects.create_index([("created_at", -1)]),
+        db.stories.create_index("id", unique=True),
+        db.stories.create_index([("created_at", -1)]),
+        db.agent_progress.create_index([("project_id", 1), ("agent_name", 1)], unique=True),
+        db.chapters.create_index([("project_id", 1), ("chapter_number", 1)], unique=True),
+        db.status_checks.create_index("id", unique=True),
+        db.llm_cache.create_index("created_at", expireAfterSeconds=LLM_CACHE_TTL_SECONDS),
+    )
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    docx_pool.shutdown(wait=False, cancel_futures=True)
+    await asyncio.gather(client.close(), mistral_http.aclose())
\ No newline at end of file
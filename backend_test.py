@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import httpx
 import sys
 import json
 from datetime import datetime
@@ -10,59 +11,64 @@ class MistralStoryMakerTester:
         self.tests_run = 0
         self.tests_passed = 0
         self.created_story_id = None
+        # Shared httpx.AsyncClient for every test; opened by main()
+        self.client = None
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
-        """Run a single API test"""
+    async def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
+        """Run a single API test
+        
+        Output is collected and printed in one block, so tests running
+        concurrently do not interleave their lines.
+        """
         url = f"{self.api_url}/{endpoint}" if not endpoint.startswith('http') else endpoint
-        if headers is None:
-            headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
+        lines = [f"\n🔍 Testing {name}...", f"   URL: {url}"]
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
+                response = await self.client.get(url, headers=headers)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+                response = await self.client.post(url, json=data, headers=headers)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=30)
+                response = await self.client.delete(url, headers=headers)
 
             success = response.status_code == expected_status
             if success:
                 self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
+                lines.append(f"✅ Passed - Status: {response.status_code}")
                 try:
                     response_data = response.json()
                     if isinstance(response_data, dict) and len(str(response_data)) < 200:
-                        print(f"   Response: {response_data}")
+                        lines.append(f"   Response: {response_data}")
                     elif isinstance(response_data, list):
-                        print(f"   Response: List with {len(response_data)} items")
+                        lines.append(f"   Response: List with {len(response_data)} items")
                     else:
-                        print(f"   Response: Large response received")
+                        lines.append(f"   Response: Large response received")
                 except:
-                    print(f"   Response: Non-JSON response")
+                    lines.append(f"   Response: Non-JSON response")
             else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
+                lines.append(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
                 try:
                     error_data = response.json()
-                    print(f"   Error: {error_data}")
+                    lines.append(f"   Error: {error_data}")
                 except:
-                    print(f"   Error: {response.text[:200]}")
+                    lines.append(f"   Error: {response.text[:200]}")
 
             return success, response.json() if response.content else {}
 
-        except requests.exceptions.Timeout:
-            print(f"❌ Failed - Request timeout")
+        except httpx.TimeoutException:
+            lines.append(f"❌ Failed - Request timeout")
             return False, {}
         except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
+            lines.append(f"❌ Failed - Error: {str(e)}")
             return False, {}
+        finally:
+            print("\n".join(lines))
 
-    def test_basic_api_health(self):
+    async def test_basic_api_health(self):
         """Test basic API health"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "API Health Check",
             "GET",
             "",
@@ -70,10 +76,10 @@ class MistralStoryMakerTester:
         )
         return success
 
-    def test_generate_story(self):
+    async def test_generate_story(self):
         """Test story generation with Mistral AI"""
         test_prompt = "A young wizard discovers a hidden library filled with magical books"
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Generate Story with Mistral AI",
             "POST",
             "generate-story",
@@ -90,13 +96,13 @@ class MistralStoryMakerTester:
             return True, response['story']
         return False, ""
 
-    def test_complete_story(self, existing_story):
+    async def test_complete_story(self, existing_story):
         """Test story completion functionality"""
         if not existing_story:
             print("❌ No existing story to complete")
             return False
             
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Complete Story with Mistral AI",
             "POST",
             "complete-story",
@@ -113,13 +119,13 @@ class MistralStoryMakerTester:
             return True
         return False
 
-    def test_chat_functionality(self):
+    async def test_chat_functionality(self):
         """Test chat with Mistral AI"""
         test_messages = [
             {"role": "user", "content": "Help me create a character for a fantasy story"}
         ]
         
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Chat with Mistral AI",
             "POST",
             "chat",
@@ -136,11 +142,11 @@ class MistralStoryMakerTester:
             return True
         return False
 
-    def test_save_story(self, story_content, prompt):
+    async def test_save_story(self, story_content, prompt):
         """Test saving a story to database"""
         test_title = f"Test Story - {datetime.now().strftime('%H:%M:%S')}"
         
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Save Story to Database",
             "POST",
             "stories",
@@ -158,9 +164,9 @@ class MistralStoryMakerTester:
             return True
         return False
 
-    def test_get_stories(self):
+    async def test_get_stories(self):
         """Test retrieving all stories"""
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get All Stories",
             "GET",
             "stories",
@@ -172,13 +178,13 @@ class MistralStoryMakerTester:
             return True, response
         return False, []
 
-    def test_get_single_story(self, story_id):
+    async def test_get_single_story(self, story_id):
         """Test retrieving a single story"""
         if not story_id:
             print("❌ No story ID provided")
             return False
             
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Get Single Story",
             "GET",
             f"stories/{story_id}",
@@ -190,13 +196,13 @@ class MistralStoryMakerTester:
             return True
         return False
 
-    def test_delete_story(self, story_id):
+    async def test_delete_story(self, story_id):
         """Test deleting a story"""
         if not story_id:
             print("❌ No story ID provided")
             return False
             
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Delete Story",
             "DELETE",
             f"stories/{story_id}",
@@ -208,10 +214,10 @@ class MistralStoryMakerTester:
             return True
         return False
 
-    def test_status_endpoints(self):
+    async def test_status_endpoints(self):
         """Test status check endpoints"""
         # Test creating status check
-        success1, response1 = self.run_test(
+        success1, response1 = await self.run_test(
             "Create Status Check",
             "POST",
             "status",
@@ -220,7 +226,7 @@ class MistralStoryMakerTester:
         )
         
         # Test getting status checks
-        success2, response2 = self.run_test(
+        success2, response2 = await self.run_test(
             "Get Status Checks",
             "GET",
             "status",
@@ -229,49 +235,62 @@ class MistralStoryMakerTester:
         
         return success1 and success2
 
-def main():
-    print("🚀 Starting Mistral Story Maker API Tests")
-    print("=" * 50)
-    
-    tester = MistralStoryMakerTester()
-    
+async def run_tests(tester):
     # Test 1: Basic API Health
-    if not tester.test_basic_api_health():
+    if not await tester.test_basic_api_health():
         print("❌ Basic API health check failed, stopping tests")
-        return 1
-
-    # Test 2: Status endpoints
-    tester.test_status_endpoints()
+        return False
 
-    # Test 3: Story Generation (Core Mistral AI functionality)
-    story_generated, generated_story = tester.test_generate_story()
+    # Tests 2, 3 and 5 are independent of each other, so run them together:
+    # status endpoints, story generation (core Mistral AI functionality), chat
+    _, (story_generated, generated_story), _ = await asyncio.gather(
+        tester.test_status_endpoints(),
+        tester.test_generate_story(),
+        tester.test_chat_functionality()
+    )
     if not story_generated:
         print("❌ Story generation failed - Mistral AI integration issue")
-        return 1
-
-    # Test 4: Story Completion
-    if generated_story:
-        tester.test_complete_story(generated_story)
-
-    # Test 5: Chat functionality
-    tester.test_chat_functionality()
+        return False
 
-    # Test 6: Save generated story
     if generated_story:
-        story_saved = tester.test_save_story(
-            generated_story, 
-            "A young wizard discovers a hidden library filled with magical books"
+        # Test 4: Story Completion, alongside Test 6: Save generated story
+        await asyncio.gather(
+            tester.test_complete_story(generated_story),
+            tester.test_save_story(
+                generated_story, 
+                "A young wizard discovers a hidden library filled with magical books"
+            )
         )
         
-        # Test 7: Retrieve all stories
-        stories_retrieved, stories_list = tester.test_get_stories()
-        
-        # Test 8: Get single story
         if tester.created_story_id:
-            tester.test_get_single_story(tester.created_story_id)
+            # Test 7: Retrieve all stories, alongside Test 8: Get single story
+            await asyncio.gather(
+                tester.test_get_stories(),
+                tester.test_get_single_story(tester.created_story_id)
+            )
             
             # Test 9: Delete story (cleanup)
-            tester.test_delete_story(tester.created_story_id)
+            await tester.test_delete_story(tester.created_story_id)
+        else:
+            # Test 7: Retrieve all stories
+            await tester.test_get_stories()
+    return True
+
+async def main():
+    print("🚀 Starting Mistral Story Maker API Tests")
+    print("=" * 50)
+    
+    tester = MistralStoryMakerTester()
+    # One keep-alive pool for the whole run, so each connection's TCP/TLS
+    # handshake is paid once rather than per test
+    async with httpx.AsyncClient(
+        timeout=30,
+        headers={'Content-Type': 'application/json'},
+        limits=httpx.Limits(max_keepalive_connections=20)
+    ) as client:
+        tester.client = client
+        if not await run_tests(tester):
+            return 1
 
     # Print final results
     print("\n" + "=" * 50)
@@ -285,4 +304,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+import agents
+from agents import ProgressThrottler
+
+INTERVAL = 1.0
+
+_real_sleep = asyncio.sleep
+
+
+class FakeClock:
+    """time.monotonic / asyncio.sleep for agents: sleeping advances the clock instantly"""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.now += max(delay, 0.0)
+        await _real_sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(agents.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(agents.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+async def _settle():
+    """Let the throttler's background task run as far as it can"""
+    for _ in range(10):
+        await _real_sleep(0)
+
+
+def _throttler(write_gate: asyncio.Event = None):
+    writes = []
+
+    async def write(*update):
+        if write_gate is not None:
+            await write_gate.wait()
+        writes.append(update)
+
+    return ProgressThrottler(write, interval=INTERVAL), writes
+
+
+def test_first_update_is_written_immediately(clock):
+    async def run():
+        throttler, writes = _throttler()
+        throttler.set("p1", 10)
+        await _settle()
+        assert clock.now == 1000.0
+        return writes
+
+    assert asyncio.run(run()) == [("p1", 10)]
+
+
+def test_updates_within_interval_coalesce_to_latest(clock):
+    async def run():
+        throttler, writes = _throttler()
+        throttler.set("p1", 10)
+        await _settle()
+        throttler.set("p1", 20)
+        throttler.set("p1", 30)
+        await _settle()
+        # The second write waited out the interval since the first
+        assert clock.now == 1000.0 + INTERVAL
+        return writes
+
+    assert asyncio.run(run()) == [("p1", 10), ("p1", 30)]
+
+
+def test_discard_drops_pending_update(clock):
+    async def run():
+        throttler, writes = _throttler()
+        throttler.set("p1", 10)
+        await _settle()
+        throttler.set("p1", 20)
+        await throttler.discard()
+        await _settle()
+        return writes
+
+    assert asyncio.run(run()) == [("p1", 10)]
+
+
+def test_discard_waits_for_write_in_flight(clock):
+    async def run():
+        write_gate = asyncio.Event()
+        throttler, writes = _throttler(write_gate)
+        throttler.set("p1", 10)
+        await _settle()
+        discard = asyncio.create_task(throttler.discard())
+        await _settle()
+        assert not discard.done()
+        write_gate.set()
+        await discard
+        return writes
+
+    assert asyncio.run(run()) == [("p1", 10)]
+
+
+def test_flush_writes_pending_update_now(clock):
+    async def run():
+        throttler, writes = _throttler()
+        throttler.set("p1", 10)
+        await _settle()
+        throttler.set("p1", 20)
+        await throttler.flush()
+        await throttler.discard()
+        return writes
+
+    assert asyncio.run(run()) == [("p1", 10), ("p1", 20)]
+
+
+def test_character_failure_cancels_remaining_calls():
+    from unittest.mock import MagicMock
+
+    from agents import CharacterAgent, MistralGate
+    from models import Character
+
+    async def run():
+        agent = CharacterAgent(MagicMock(), MagicMock(), MistralGate(max_concurrent=10, rpm=6000))
+        updates = []
+        cancelled = []
+        release = asyncio.Event()
+
+        async def update_progress(project_id, status, progress, task=None, error=None):
+            updates.append(status)
+
+        async def cached_complete(**request):
+            if "Failing" in request["messages"][-1]["content"]:
+                await _real_sleep(0)
+                raise RuntimeError("Mistral is down")
+            try:
+                await release.wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "profile"
+
+        agent.update_progress = update_progress
+        agent._cached_complete = cached_complete
+        characters = [Character(name="Failing"), Character(name="Slow")]
+        with pytest.raises(RuntimeError, match="Mistral is down"):
+            await agent.process("p1", characters, {"world_bible": ""})
+        # A call left running would finish now and report progress
+        release.set()
+        await _settle()
+        return list(updates), list(cancelled)
+
+    updates, cancelled = asyncio.run(run())
+    assert cancelled == [True]
+    # Nothing reports "running" after the failure
+    assert updates == [agents.AgentStatusEnum.running, agents.AgentStatusEnum.error]
@@ -0,0 +1,30 @@
+import re
+
+from document_formatter import DocumentFormatter, FIRST_CHAPTER_PAGE
+from models import ChapterContent
+
+_TOC_PAGE_RE = re.compile(r'<w:tab/><w:t xml:space="preserve">(\d+)</w:t>')
+
+
+def _chapters(*word_counts):
+    return [
+        ChapterContent(chapter_number=i, title=f"Title {i}", content="", word_count=word_count)
+        for i, word_count in enumerate(word_counts, start=1)
+    ]
+
+
+def test_toc_page_estimates():
+    # 300 words a page, at least one page per chapter, starting after the title page and TOC
+    xml = DocumentFormatter()._toc_xml(_chapters(700, 300, 1, 0, 301))
+    assert [int(page) for page in _TOC_PAGE_RE.findall(xml)] == [3, 6, 7, 8, 9]
+
+
+def test_toc_first_chapter_page():
+    xml = DocumentFormatter()._toc_xml(_chapters(5000))
+    assert _TOC_PAGE_RE.findall(xml) == [str(FIRST_CHAPTER_PAGE)]
+
+
+def test_toc_escapes_titles():
+    chapters = [ChapterContent(chapter_number=1, title="Fire & <Ice>", content="", word_count=10)]
+    xml = DocumentFormatter()._toc_xml(chapters)
+    assert "Chapter 1: Fire &amp; &lt;Ice&gt;" in xml
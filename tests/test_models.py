@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+
+from models import AgentProgress, AgentStatusEnum, ProjectUpdate
+
+
+def _progress(status):
+    return AgentProgress(agent_name="PlotAgent", status=status, progress_percentage=50.0)
+
+
+@pytest.mark.parametrize("status", list(AgentStatusEnum))
+def test_status_round_trips_through_its_name(status):
+    dumped = _progress(status).model_dump()
+    assert dumped["status"] == status.name
+    assert _progress(dumped["status"]).status is status
+    assert AgentProgress.model_validate_json(_progress(status).model_dump_json()).status is status
+
+
+def test_status_accepts_name_member_and_value():
+    assert AgentStatusEnum("running") is AgentStatusEnum.running
+    assert AgentStatusEnum(3) is AgentStatusEnum.error
+    assert _progress(AgentStatusEnum.completed).status is AgentStatusEnum.completed
+    assert _progress(0).status is AgentStatusEnum.pending
+
+
+def test_status_label_and_str_are_the_name():
+    assert AgentStatusEnum.completed.label == "completed"
+    assert str(AgentStatusEnum.completed) == "completed"
+    assert AgentStatusEnum.running < AgentStatusEnum.completed
+
+
+def test_unknown_status_is_rejected():
+    with pytest.raises(ValueError):
+        AgentStatusEnum("paused")
+    with pytest.raises(ValidationError):
+        _progress("paused")
+
+
+@pytest.mark.parametrize("field", ["title", "target_chapters", "target_words_per_chapter", "characters"])
+def test_project_update_rejects_null_for_required_fields(field):
+    with pytest.raises(ValidationError):
+        ProjectUpdate(**{field: None})
+
+
+def test_project_update_only_sets_fields_sent():
+    update = ProjectUpdate(title="New title", worldbuilding=None)
+    assert update.model_dump(exclude_unset=True) == {"title": "New title", "worldbuilding": None}
@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from orchestrator import MasterOrchestrator
+
+BODY = "The rain had not stopped for days."
+
+
+@pytest.fixture
+def orchestrator():
+    return MasterOrchestrator(mistral_client=MagicMock(), db=MagicMock(), batch_chapters=False)
+
+
+@pytest.mark.parametrize("first_line, title", [
+    ("Echoes", "Echoes"),
+    ("## Echoes", "Echoes"),
+    ("**Echoes**", "Echoes"),
+    ("Chapter 10: Echoes", "Echoes"),
+    ("Chapter 10: *Echoes*", "Echoes"),
+    ("Chapter 10 - _Echoes_", "Echoes"),
+    ("**Chapter 10: Echoes**", "Echoes"),
+    ("# Chapter 10. **Echoes**", "Echoes"),
+    ("chapter 10: Echoes of *the* Past", "Echoes of *the* Past"),
+])
+def test_parse_chapter_title(orchestrator, first_line, title):
+    chapter = orchestrator._parse_chapter(10, f"{first_line}\n\n{BODY}\n")
+    assert chapter.title == title
+    assert chapter.content == BODY
+    assert chapter.word_count == 7
+
+
+@pytest.mark.parametrize("first_line", ["**Chapter 10**", "# Chapter 10:"])
+def test_parse_chapter_without_title_uses_number(orchestrator, first_line):
+    chapter = orchestrator._parse_chapter(10, f"{first_line}\n{BODY}")
+    assert chapter.title == "Chapter 10"
+    assert chapter.content == BODY
+
+
+def test_parse_chapter_single_line(orchestrator):
+    chapter = orchestrator._parse_chapter(3, BODY)
+    assert chapter.chapter_number == 3
+    assert chapter.title == "Chapter 3"
+    assert chapter.content == BODY
+
+
+@pytest.mark.parametrize("first_line", ["Chapter 10", "# Chapter 10:", "**Chapter 10**"])
+@pytest.mark.parametrize("separator", ["\n", "\n\n"])
+def test_bare_chapter_heading_keeps_first_paragraph(orchestrator, first_line, separator):
+    text = f"{first_line}{separator}The rain fell on the town.\n\nMore text here."
+    chapter = orchestrator._parse_chapter(10, text)
+    assert chapter.title == "Chapter 10"
+    assert chapter.content == "The rain fell on the town.\n\nMore text here."
+
+
+def test_failed_run_cancels_worldbuilding(orchestrator):
+    from unittest.mock import AsyncMock
+
+    from models import AgentStatusEnum
+
+    statuses = []
+    world_finished = []
+    release = None
+
+    async def update_one(query, update):
+        statuses.append(update["$set"].get("current_status"))
+
+    async def worldbuilding(project_id, worldbuilding_data):
+        await release.wait()
+        world_finished.append(True)
+        await update_one({"id": project_id}, {"$set": {"current_status": AgentStatusEnum.completed.label}})
+
+    async def characters(project_id, characters, world_context):
+        raise RuntimeError("character call failed")
+
+    orchestrator.db.story_projects.find_one = AsyncMock(return_value={"id": "p1", "title": "Book"})
+    orchestrator.db.story_projects.update_one = update_one
+    orchestrator._initialize_agent_tracking = AsyncMock()
+    orchestrator._reset_generated_chapters = AsyncMock()
+    orchestrator.document_formatter.prepare_template = AsyncMock()
+    orchestrator.worldbuilding_agent.process = worldbuilding
+    orchestrator.character_agent.process = characters
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        with pytest.raises(RuntimeError, match="character call failed"):
+            await orchestrator.orchestrate_story_generation("p1")
+        # A world task left running would finish now and report "completed"
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert world_finished == []
+    assert statuses == [AgentStatusEnum.error.label]
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+os.environ.setdefault("MISTRAL_API_KEY", "test-key")
+
+import server  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client():
+    async def fail():
+        raise RuntimeError("boom")
+
+    server.app.add_api_route("/test/unhandled-error", fail)
+    # Not used as a context manager, so the startup hooks (which need MongoDB) do not run
+    return TestClient(server.app, raise_server_exceptions=False)
+
+
+def test_unhandled_error_is_a_json_500_with_cors_headers(client):
+    response = client.get("/test/unhandled-error", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "boom"}
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_http_exception_keeps_status_and_cors_headers(client):
+    response = client.get("/api/unknown-route", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 404
+    assert "access-control-allow-origin" in response.headers